@@ -1,10 +1,10 @@
-from app.services.supabase import get_supabase_client
+from app.services.supabase import get_async_supabase_client
 from app.services.ollama import get_ollama_client
-from app.services.comfyui import get_comfyui_client
+from app.services.comfyui import get_comfyui_pool
 
 
-def get_db():
-    return get_supabase_client()
+async def get_db():
+    return await get_async_supabase_client()
 
 
 def get_ollama():
@@ -12,4 +12,4 @@ def get_ollama():
 
 
 def get_comfyui():
-    return get_comfyui_client()
+    return get_comfyui_pool()
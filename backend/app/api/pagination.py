@@ -0,0 +1,53 @@
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+
+
+def parse_cursor(cursor: str) -> tuple[str, str]:
+    """Parse a `created_at,id` keyset cursor, as taken from any listed row."""
+    created_at, _, row_id = cursor.partition(",")
+    try:
+        # An unencoded "+" in the UTC offset arrives as a space
+        timestamp = datetime.fromisoformat(created_at.strip().replace(" ", "+"))
+        return timestamp.isoformat(), str(UUID(row_id.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+
+def select_columns(fields: str | None, allowed: tuple[str, ...], default: tuple[str, ...]) -> str:
+    """Resolve a comma-separated field projection; id and created_at are always kept for cursors."""
+    if not fields:
+        columns = list(default)
+    else:
+        columns = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = sorted(set(columns) - set(allowed))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    for column in ("created_at", "id"):
+        if column not in columns:
+            columns.insert(0, column)
+    return ", ".join(columns)
+
+
+def keyset_page(query, before: str | None, after: str | None, limit: int, newest_first: bool):
+    """Apply a (created_at, id) keyset window to a query.
+
+    `before` selects older rows and `after` newer ones; with neither, the page
+    starts at the newest rows. Returns the query and whether the fetched rows
+    must be reversed to come back in the listing's natural order.
+    """
+    windows = []
+    for cursor, op in ((before, "lt"), (after, "gt")):
+        if cursor:
+            created_at, row_id = parse_cursor(cursor)
+            windows.append(f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}.{row_id})')
+    if len(windows) == 1:
+        query = query.or_(windows[0])
+    elif windows:
+        query = query.or_(f"and({','.join(f'or({window})' for window in windows)})")
+
+    # Walk forward from an `after` cursor; otherwise walk back from the newest row
+    fetch_desc = not (after and not before)
+    query = query.order("created_at", desc=fetch_desc).order("id", desc=fetch_desc).limit(limit)
+    return query, fetch_desc != newest_first
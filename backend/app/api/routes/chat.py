@@ -1,31 +1,100 @@
+import asyncio
 import json
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
 from sse_starlette.sse import EventSourceResponse
 
 from app.api.deps import get_db
+from app.api.pagination import keyset_page, select_columns
+from app.config import settings
+from app.core.events import EventBuffer, EventBufferStore, coalesce_chunks
 from app.core.orchestrator import Orchestrator
+from app.core.store import OrchestratorStore
 from app.models.message import MessageCreate
 from app.models.conversation import Conversation, ConversationCreate
+from app.services.message_writer import get_message_writer
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+MESSAGE_COLUMNS = ("id", "conversation_id", "role", "content", "metadata", "created_at")
+
 # Store active orchestrators by conversation ID
-active_orchestrators: dict[str, Orchestrator] = {}
+orchestrator_store = OrchestratorStore(
+    max_size=settings.orchestrator_cache_size,
+    idle_ttl=settings.orchestrator_idle_ttl,
+)
+
+# Recent stream events by conversation ID, for Last-Event-ID resume
+event_buffers = EventBufferStore(
+    max_size=settings.sse_buffer_cache_size,
+    max_events=settings.sse_replay_buffer_size,
+    disconnect_grace=settings.sse_disconnect_grace,
+)
+
+
+def build_orchestrator(
+    session: dict | None,
+    state: dict | None = None,
+    history: list[dict] | None = None,
+) -> Orchestrator:
+    """Create an orchestrator from a session row's model assignments and settings."""
+    session = session or {}
+    session_settings = session.get("settings") or {}
+    execution_mode = "parallel" if session_settings.get("execution_mode") == "parallel" else "sequential"
+    model_assignments = session.get("model_assignments") or {}
+    if state is None:
+        return Orchestrator(model_assignments, execution_mode=execution_mode)
+    return Orchestrator.from_snapshot(model_assignments, state, history=history, execution_mode=execution_mode)
+
+
+async def load_orchestrator(db, conversation: dict) -> Orchestrator:
+    """Return the cached orchestrator, rehydrating it from the database if needed."""
+    conv_id = conversation["id"]
+    state = conversation.get("orchestrator_state") or {
+        "phase": conversation["status"],
+        "round_count": 0,
+    }
+
+    # A cached orchestrator is stale if another worker has advanced the conversation;
+    # its own summary may be newer than the saved one, so only compare progress
+    orchestrator = orchestrator_store.get(conv_id)
+    if orchestrator is not None:
+        cached = orchestrator.snapshot(include_history=False)
+        if all(cached[key] == state.get(key) for key in ("phase", "round_count")):
+            return orchestrator
+
+    session = await db.table("sessions").select("*").eq("id", conversation["session_id"]).execute()
+    messages = await db.table("messages")\
+        .select("role, content, metadata")\
+        .eq("conversation_id", conv_id)\
+        .order("created_at")\
+        .execute()
+
+    history = [
+        {
+            "role": row["role"],
+            "role_name": (row.get("metadata") or {}).get("name") or row["role"].capitalize(),
+            "content": row["content"],
+        }
+        for row in messages.data
+    ]
+    orchestrator = build_orchestrator(session.data[0] if session.data else None, state, history)
+    orchestrator_store.put(conv_id, orchestrator)
+    return orchestrator
 
 
 @router.post("/conversations", response_model=Conversation)
 async def create_conversation(data: ConversationCreate):
-    db = get_db()
+    db = await get_db()
 
     # Get session for model assignments
-    session = db.table("sessions").select("*").eq("id", str(data.session_id)).execute()
+    session = await db.table("sessions").select("*").eq("id", str(data.session_id)).execute()
     if not session.data:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # Create conversation
-    result = db.table("conversations").insert({
+    result = await db.table("conversations").insert({
         "session_id": str(data.session_id),
         "status": "ideation",
     }).execute()
@@ -35,70 +104,150 @@ async def create_conversation(data: ConversationCreate):
 
     # Initialize orchestrator
     conv_id = result.data[0]["id"]
-    model_assignments = session.data[0].get("model_assignments", {})
-    active_orchestrators[conv_id] = Orchestrator(model_assignments)
+    orchestrator_store.put(conv_id, build_orchestrator(session.data[0]))
 
     return result.data[0]
 
 
+async def run_round(db, conv_id: str, orchestrator: Orchestrator, content: str, buffer: EventBuffer):
+    """Run one orchestration round, publishing its events to the conversation's buffer.
+
+    Cancelled when every client has gone away; closing the event generator
+    closes the Ollama streams, and partial replies are saved as truncated.
+    """
+    message_writer = get_message_writer()
+    events = orchestrator.process_user_message(content)
+    # Batch token chunks into fewer, smaller frames
+    stream = coalesce_chunks(
+        events,
+        window=settings.sse_coalesce_window,
+        max_chars=settings.sse_coalesce_max_chars,
+    )
+    try:
+        async for event in stream:
+            # Save specialist messages to DB
+            if event["type"] == "specialist_end":
+                metadata = {"name": event["name"]}
+                if "parameters" in event:
+                    metadata["parameters"] = event["parameters"]
+                await message_writer.write({
+                    "conversation_id": conv_id,
+                    "role": event["role"],
+                    "content": event["content"],
+                    "metadata": metadata,
+                })
+
+            await buffer.publish(event)
+
+        # Update conversation status and persist orchestrator state
+        await db.table("conversations").update({
+            "status": orchestrator.current_phase.value,
+            "orchestrator_state": orchestrator.snapshot(include_history=False),
+        }).eq("id", conv_id).execute()
+
+    except asyncio.CancelledError:
+        await stream.aclose()
+        await events.aclose()
+        for entry in orchestrator.truncate_round():
+            await message_writer.write({
+                "conversation_id": conv_id,
+                "role": entry["role"],
+                "content": entry["content"],
+                "metadata": {"name": entry["role_name"], "truncated": True},
+            })
+        await buffer.publish({"type": "round_cancelled"})
+        raise
+
+    except Exception as e:
+        await buffer.publish({"type": "error", "message": str(e)})
+
+    finally:
+        await buffer.finish()
+
+
+def stream_events(buffer: EventBuffer, last_event_id: int) -> EventSourceResponse:
+    async def event_generator():
+        async for event_id, event in buffer.subscribe(last_event_id):
+            frame = {
+                "event": event["type"],
+                "data": json.dumps(event, separators=(",", ":")),
+            }
+            if event_id is not None:
+                frame["id"] = str(event_id)
+            yield frame
+
+    return EventSourceResponse(event_generator())
+
+
 @router.post("/conversations/{conversation_id}/messages")
 async def send_message(conversation_id: UUID, message: MessageCreate):
-    db = get_db()
+    db = await get_db()
     conv_id_str = str(conversation_id)
 
     # Verify conversation exists
-    conv = db.table("conversations").select("*").eq("id", conv_id_str).execute()
+    conv = await db.table("conversations").select("*").eq("id", conv_id_str).execute()
     if not conv.data:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Get or create orchestrator
-    if conv_id_str not in active_orchestrators:
-        session = db.table("sessions").select("*").eq("id", conv.data[0]["session_id"]).execute()
-        model_assignments = session.data[0].get("model_assignments", {}) if session.data else {}
-        active_orchestrators[conv_id_str] = Orchestrator(model_assignments)
-
-    # Save user message
-    db.table("messages").insert({
-        "conversation_id": conv_id_str,
-        "role": "user",
-        "content": message.content,
-        "metadata": {},
-    }).execute()
+    # Get or rehydrate orchestrator
+    orchestrator = await load_orchestrator(db, conv.data[0])
 
-    async def event_generator():
-        orchestrator = active_orchestrators[conv_id_str]
+    buffer = event_buffers.get_or_create(conv_id_str)
+    if buffer.active:
+        raise HTTPException(status_code=409, detail="A round is already in progress")
+    buffer.start()
+    round_start_id = buffer.last_id
 
-        async for event in orchestrator.process_user_message(message.content):
-            # Save specialist messages to DB
-            if event["type"] == "specialist_end":
-                db.table("messages").insert({
-                    "conversation_id": conv_id_str,
-                    "role": event["role"],
-                    "content": event["content"],
-                    "metadata": {"name": event["name"]},
-                }).execute()
+    try:
+        # Save user message
+        await get_message_writer().write({
+            "conversation_id": conv_id_str,
+            "role": "user",
+            "content": message.content,
+            "metadata": {},
+        })
+    except Exception:
+        await buffer.finish()
+        raise
 
-            yield {
-                "event": event["type"],
-                "data": json.dumps(event),
-            }
+    # The round runs independently of this connection so clients can resume it
+    buffer.task = asyncio.create_task(run_round(db, conv_id_str, orchestrator, message.content, buffer))
 
-        # Update conversation status
-        db.table("conversations").update({
-            "status": orchestrator.current_phase.value,
-        }).eq("id", conv_id_str).execute()
+    return stream_events(buffer, round_start_id)
 
-    return EventSourceResponse(event_generator())
 
+@router.get("/conversations/{conversation_id}/events")
+async def resume_events(
+    conversation_id: UUID,
+    last_event_id: int = Header(0, alias="Last-Event-ID"),
+):
+    """Replay events missed since Last-Event-ID and follow the current round."""
+    buffer = event_buffers.get(str(conversation_id))
+    if buffer is None:
+        raise HTTPException(status_code=404, detail="No event stream for conversation")
 
-@router.get("/conversations/{conversation_id}/messages")
-async def get_messages(conversation_id: UUID):
-    db = get_db()
+    return stream_events(buffer, last_event_id)
 
-    result = db.table("messages")\
-        .select("*")\
-        .eq("conversation_id", str(conversation_id))\
-        .order("created_at")\
-        .execute()
 
-    return result.data
+@router.get("/conversations/{conversation_id}/messages")
+async def get_messages(
+    conversation_id: UUID,
+    limit: int = Query(100, ge=1, le=500),
+    before: str | None = None,
+    after: str | None = None,
+    fields: str | None = None,
+):
+    """List messages oldest first, one page at a time.
+
+    Defaults to the newest page. Pass a `created_at,id` cursor from a row as
+    `before` for older messages or `after` for newer ones.
+    """
+    db = await get_db()
+
+    query = db.table("messages")\
+        .select(select_columns(fields, MESSAGE_COLUMNS, MESSAGE_COLUMNS))\
+        .eq("conversation_id", str(conversation_id))
+    query, reverse = keyset_page(query, before, after, limit, newest_first=False)
+    result = await query.execute()
+
+    return result.data[::-1] if reverse else result.data
@@ -1,71 +1,190 @@
 import asyncio
-from uuid import UUID
+import itertools
+import json
+import random
+import time
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query
+from sse_starlette.sse import EventSourceResponse
 
 from app.api.deps import get_db, get_comfyui
-from app.models.generation import Generation, GenerationCreate
-from app.workflows.builder import build_txt2img_workflow
-from app.services.supabase import get_supabase_client
+from app.api.pagination import keyset_page, select_columns
+from app.config import settings
+from app.core.ingest import ingest_outputs, split_batch_outputs
+from app.core.metrics import GENERATION_RUN, span
+from app.core.scheduler import GenerationScheduler, QueueFullError
+from app.models.generation import Generation, GenerationBatchCreate, GenerationCreate
+from app.services.generation_events import TERMINAL_STATUSES, get_generation_events
+from app.services.generation_status import get_status_writer
+from app.services.storage import get_storage_client
+from app.workflows.builder import build_txt2img_workflow, get_workflow_checkpoint, workflow_hash
 
 router = APIRouter(prefix="/generations", tags=["generations"])
 
+# Columns pushed to event stream clients; never the large workflow_json
+EVENT_COLUMNS = "id, conversation_id, status, progress, outputs, error"
 
-async def run_generation(generation_id: str, workflow: dict):
-    """Background task to run generation and poll for completion."""
-    db = get_supabase_client()
-    comfyui = get_comfyui()
+GENERATION_COLUMNS = (
+    "id", "conversation_id", "workflow_json", "workflow_hash", "parameters",
+    "status", "progress", "outputs", "error", "created_at",
+)
+# Listings leave out workflow_json unless asked for
+LIST_COLUMNS = tuple(column for column in GENERATION_COLUMNS if column != "workflow_json")
+
+# Single-flight for fixed-seed requests: the generation running each workflow
+# hash, and the rows of identical requests waiting on that leader
+running_workflows: dict[str, str] = {}
+waiting_generations: dict[str, list[str]] = {}
+
+
+def release_waiting(generation_id: str, workflow: dict) -> list[str]:
+    """Stop collapsing requests onto a finished leader and return the rows that waited on it."""
+    digest = workflow_hash(workflow)
+    if running_workflows.get(digest) == generation_id:
+        del running_workflows[digest]
+    return waiting_generations.pop(generation_id, [])
+
+
+async def run_generation(generation_id: str, workflow: dict, variant_ids: list[str] | None = None):
+    """Background task to run generation and follow its progress.
+
+    A batched prompt carries the rows of its other batch indices in
+    `variant_ids`; every row gets the prompt's progress and its own outputs.
+    """
+    started = time.perf_counter()
+    outcome = "failed"
+    try:
+        with span("generation.run", generation_id=generation_id, images=1 + len(variant_ids or [])):
+            outcome = await _run_generation(generation_id, workflow, variant_ids) or "failed"
+    finally:
+        GENERATION_RUN.observe(time.perf_counter() - started, status=outcome)
+
+
+async def _run_generation(generation_id: str, workflow: dict, variant_ids: list[str] | None) -> str:
+    """Run the workflow and record its status; returns the final status."""
+    status_writer = get_status_writer()
+    pool = get_comfyui()
+    comfyui = None
+    generation_ids = [generation_id, *(variant_ids or [])]
+
+    async def write_all(fields: dict, final: bool = False):
+        # Identical requests collapsed onto this one mirror its status
+        waiting = release_waiting(generation_id, workflow) if final else waiting_generations.get(generation_id, [])
+        for gen_id in [*generation_ids, *waiting]:
+            await status_writer.write(gen_id, fields)
 
     try:
+        # Route to a backend, preferring one with the checkpoint already loaded
+        comfyui = await pool.acquire(get_workflow_checkpoint(workflow))
+
         # Update status to running
-        db.table("generations").update({
+        await write_all({
             "status": "running",
             "progress": 0,
-        }).eq("id", generation_id).execute()
+        })
 
         # Queue workflow
         prompt_id = await comfyui.queue_workflow(workflow)
 
-        # Poll for completion
-        max_attempts = 300  # 5 minutes max
-        for attempt in range(max_attempts):
-            progress = await comfyui.get_progress(prompt_id)
+        outputs = None
+        async with asyncio.timeout(settings.comfyui_generation_timeout):
+            async for progress in comfyui.watch_progress(prompt_id):
+                if progress["status"] == "complete":
+                    outputs = progress.get("outputs", {})
+                    break
 
-            if progress["status"] == "complete":
-                # Get output images
-                outputs = progress.get("outputs", {})
+                if progress["status"] == "failed":
+                    await write_all({
+                        "status": "failed",
+                        "error": progress["error"],
+                    }, final=True)
+                    return "failed"
 
-                db.table("generations").update({
-                    "status": "complete",
-                    "progress": 100,
-                    "parameters": {**outputs, "prompt_id": prompt_id},
-                }).eq("id", generation_id).execute()
-                return
+                # Update step-level progress (coalesced by the status writer)
+                for gen_id in [*generation_ids, *waiting_generations.get(generation_id, [])]:
+                    status_writer.update_progress(gen_id, progress["progress"])
+
+        if outputs is None:
+            return "failed"
+
+        # The render is done: free the backend slot before copying outputs,
+        # and keep slow uploads outside the ComfyUI timeout
+        source = comfyui
+        await pool.release(comfyui)
+        comfyui = None
 
-            # Update progress (estimated)
-            estimated_progress = min(95, (attempt / max_attempts) * 100)
-            db.table("generations").update({
-                "progress": int(estimated_progress),
-            }).eq("id", generation_id).execute()
+        # Copy output files into storage, one set per batch index
+        variants = split_batch_outputs(outputs, len(generation_ids))
+        completed = []
+        for gen_id, variant_outputs in zip(generation_ids, variants):
+            stored = await ingest_outputs(source, get_storage_client(), variant_outputs)
+            completed.append({
+                "status": "complete",
+                "progress": 100,
+                "outputs": stored,
+                "parameters": {**variant_outputs, "prompt_id": prompt_id},
+            })
+            await status_writer.write(gen_id, completed[-1])
 
-            await asyncio.sleep(1)
+        # Followers are released only once everything is stored, so a failed
+        # ingest above still reaches them through the failure path
+        for gen_id in release_waiting(generation_id, workflow):
+            await status_writer.write(gen_id, completed[0])
+        return "complete"
 
-        # Timeout
-        db.table("generations").update({
+    except TimeoutError:
+        await write_all({
             "status": "failed",
             "error": "Generation timed out",
-        }).eq("id", generation_id).execute()
+        }, final=True)
+        return "timeout"
 
     except Exception as e:
-        db.table("generations").update({
+        await write_all({
             "status": "failed",
             "error": str(e),
-        }).eq("id", generation_id).execute()
+        }, final=True)
+        return "failed"
+
+    finally:
+        release_waiting(generation_id, workflow)
+        if comfyui is not None:
+            await pool.release(comfyui)
+
+
+scheduler = GenerationScheduler(
+    run_generation,
+    concurrency=settings.comfyui_max_concurrency * len(settings.comfyui_urls),
+    max_queue=settings.generation_max_queue,
+    lease_seconds=settings.generation_lease_seconds,
+)
+
+
+def publish_created(generation: dict):
+    events = get_generation_events()
+    events.track(generation["id"], generation["conversation_id"])
+    events.publish(generation["id"], {
+        "status": generation["status"],
+        "progress": generation["progress"],
+        "outputs": generation.get("outputs") or [],
+    })
+
+
+def queue_full_error() -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Generation queue is full, try again shortly",
+        headers={"Retry-After": "5"},
+    )
 
 
 @router.post("/", response_model=Generation)
-async def create_generation(data: GenerationCreate, background_tasks: BackgroundTasks):
-    db = get_db()
+async def create_generation(data: GenerationCreate):
+    if scheduler.is_saturated():
+        raise queue_full_error()
+
+    db = await get_db()
 
     # Build workflow
     workflow = build_txt2img_workflow(
@@ -73,31 +192,224 @@ async def create_generation(data: GenerationCreate, background_tasks: Background
         negative_prompt=data.negative_prompt,
         **data.parameters,
     )
+    digest = workflow_hash(workflow)
+
+    # Only a fixed seed can reproduce an earlier result; random seeds never match
+    memoize = settings.generation_memoize and data.parameters.get("seed") is not None
+    if memoize:
+        cached = await db.table("generations")\
+            .select("id, outputs")\
+            .eq("workflow_hash", digest)\
+            .eq("status", "complete")\
+            .limit(1)\
+            .execute()
+        if cached.data:
+            result = await db.table("generations").insert({
+                "conversation_id": str(data.conversation_id),
+                "workflow_json": workflow,
+                "workflow_hash": digest,
+                "parameters": {**data.parameters, "memoized_from": cached.data[0]["id"]},
+                "status": "complete",
+                "progress": 100,
+                "outputs": cached.data[0]["outputs"],
+            }).execute()
+            if not result.data:
+                raise HTTPException(status_code=500, detail="Failed to create generation")
+            publish_created(result.data[0])
+            return result.data[0]
 
     # Create generation record
-    result = db.table("generations").insert({
+    result = await db.table("generations").insert({
         "conversation_id": str(data.conversation_id),
         "workflow_json": workflow,
+        "workflow_hash": digest,
         "parameters": data.parameters,
+        "priority": data.priority,
         "status": "queued",
         "progress": 0,
+        **scheduler.lease(),
     }).execute()
 
     if not result.data:
         raise HTTPException(status_code=500, detail="Failed to create generation")
 
     generation = result.data[0]
+    publish_created(generation)
 
-    # Start background generation
-    background_tasks.add_task(run_generation, generation["id"], workflow)
+    if memoize:
+        # An identical request is already running: follow it instead of queueing again
+        leader_id = running_workflows.get(digest)
+        if leader_id is not None:
+            waiting_generations[leader_id].append(generation["id"])
+            return generation
+        running_workflows[digest] = generation["id"]
+        waiting_generations[generation["id"]] = []
+
+    # Hand the job to the scheduler
+    try:
+        generation["queue_position"] = await scheduler.submit(generation["id"], workflow, data.priority)
+    except QueueFullError:
+        for gen_id in [generation["id"], *release_waiting(generation["id"], workflow)]:
+            await db.table("generations").update({
+                "status": "failed",
+                "error": "Generation queue is full",
+            }).eq("id", gen_id).execute()
+        raise queue_full_error()
 
     return generation
 
 
+@router.post("/batch", response_model=list[Generation])
+async def create_generation_batch(data: GenerationBatchCreate):
+    """Create a seed sweep / parameter grid as batched ComfyUI prompts.
+
+    Variants sharing every parameter but the batch index are sampled in one
+    prompt via `batch_size`; each image still gets its own generations row.
+    """
+    if data.batch_size > settings.generation_max_batch_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"batch_size may be at most {settings.generation_max_batch_size}",
+        )
+
+    grid_keys = list(data.grid)
+    combinations = [dict(zip(grid_keys, values)) for values in itertools.product(*data.grid.values())]
+    seeds = data.seeds or [data.parameters.get("seed")]
+    packs = [(combination, seed) for combination in combinations for seed in seeds]
+
+    if len(packs) * data.batch_size > settings.generation_max_batch_images:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may produce at most {settings.generation_max_batch_images} images",
+        )
+    if scheduler.queued + len(packs) > scheduler.max_queue:
+        raise queue_full_error()
+
+    db = await get_db()
+
+    rows = []
+    workflows = []
+    for combination, seed in packs:
+        # Pin the seed so each image is reproducible from (seed, batch_index)
+        if seed is None:
+            seed = random.randint(0, 2**32 - 1)
+        parameters = {**data.parameters, **combination, "seed": seed}
+        try:
+            workflow = build_txt2img_workflow(
+                prompt=data.prompt,
+                negative_prompt=data.negative_prompt,
+                batch_size=data.batch_size,
+                **parameters,
+            )
+        except TypeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        workflows.append(workflow)
+
+        batch_id = str(uuid4())
+        for index in range(data.batch_size):
+            rows.append({
+                "conversation_id": str(data.conversation_id),
+                "workflow_json": workflow,
+                "workflow_hash": workflow_hash(workflow),
+                "parameters": {
+                    **parameters,
+                    "batch_id": batch_id,
+                    "batch_index": index,
+                    "batch_size": data.batch_size,
+                },
+                "priority": data.priority,
+                "status": "queued",
+                "progress": 0,
+                **scheduler.lease(),
+            })
+
+    # One insert for every row of the batch
+    result = await db.table("generations").insert(rows).execute()
+    if len(result.data) != len(rows):
+        raise HTTPException(status_code=500, detail="Failed to create generations")
+
+    generations = result.data
+    for generation in generations:
+        publish_created(generation)
+    for pack, workflow in enumerate(workflows):
+        pack_rows = generations[pack * data.batch_size:(pack + 1) * data.batch_size]
+        position = await scheduler.submit(
+            pack_rows[0]["id"],
+            workflow,
+            data.priority,
+            force=True,
+            variant_ids=[row["id"] for row in pack_rows[1:]],
+        )
+        for row in pack_rows:
+            row["queue_position"] = position
+
+    return generations
+
+
+def stream_generation_events(queue: asyncio.Queue, snapshot: list[dict], single: bool) -> EventSourceResponse:
+    """Send current state, then live changes; a single-generation stream ends when it finishes."""
+    events = get_generation_events()
+
+    async def event_generator():
+        try:
+            for event in snapshot:
+                yield {"event": "generation", "data": json.dumps(event, separators=(",", ":"), default=str)}
+            if single and snapshot and snapshot[0]["status"] in TERMINAL_STATUSES:
+                return
+            while True:
+                event = await queue.get()
+                yield {"event": "generation", "data": json.dumps(event, separators=(",", ":"), default=str)}
+                if single and event.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            events.unsubscribe(queue)
+
+    return EventSourceResponse(event_generator())
+
+
+@router.get("/{generation_id}/events")
+async def generation_events(generation_id: UUID):
+    """Push status, progress and outputs of one generation until it finishes."""
+    events = get_generation_events()
+    # Subscribe before reading the snapshot so no change falls in between
+    queue = events.subscribe(generation_id=str(generation_id))
+    try:
+        db = await get_db()
+        result = await db.table("generations").select(EVENT_COLUMNS).eq("id", str(generation_id)).execute()
+    except Exception:
+        events.unsubscribe(queue)
+        raise
+    if not result.data:
+        events.unsubscribe(queue)
+        raise HTTPException(status_code=404, detail="Generation not found")
+
+    return stream_generation_events(queue, result.data, single=True)
+
+
+@router.get("/conversation/{conversation_id}/events")
+async def conversation_generation_events(conversation_id: UUID):
+    """Push changes to a conversation's generations, starting with those still in progress."""
+    events = get_generation_events()
+    queue = events.subscribe(conversation_id=str(conversation_id))
+    try:
+        db = await get_db()
+        result = await db.table("generations")\
+            .select(EVENT_COLUMNS)\
+            .eq("conversation_id", str(conversation_id))\
+            .in_("status", ["queued", "running"])\
+            .order("created_at")\
+            .execute()
+    except Exception:
+        events.unsubscribe(queue)
+        raise
+
+    return stream_generation_events(queue, result.data, single=False)
+
+
 @router.get("/{generation_id}", response_model=Generation)
 async def get_generation(generation_id: UUID):
-    db = get_db()
-    result = db.table("generations").select("*").eq("id", str(generation_id)).execute()
+    db = await get_db()
+    result = await db.table("generations").select("*").eq("id", str(generation_id)).execute()
 
     if not result.data:
         raise HTTPException(status_code=404, detail="Generation not found")
@@ -106,12 +418,23 @@ async def get_generation(generation_id: UUID):
 
 
 @router.get("/conversation/{conversation_id}")
-async def get_conversation_generations(conversation_id: UUID):
-    db = get_db()
-    result = db.table("generations")\
-        .select("*")\
-        .eq("conversation_id", str(conversation_id))\
-        .order("created_at", desc=True)\
-        .execute()
-
-    return result.data
+async def get_conversation_generations(
+    conversation_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    before: str | None = None,
+    after: str | None = None,
+    fields: str | None = None,
+):
+    """List generations newest first, one page at a time.
+
+    Pass a `created_at,id` cursor from a row as `before` for older
+    generations or `after` for newer ones.
+    """
+    db = await get_db()
+    query = db.table("generations")\
+        .select(select_columns(fields, GENERATION_COLUMNS, LIST_COLUMNS))\
+        .eq("conversation_id", str(conversation_id))
+    query, reverse = keyset_page(query, before, after, limit, newest_first=True)
+    result = await query.execute()
+
+    return result.data[::-1] if reverse else result.data
@@ -10,8 +10,8 @@ router = APIRouter(prefix="/sessions", tags=["sessions"])
 
 @router.post("/", response_model=Session)
 async def create_session(session: SessionCreate):
-    db = get_db()
-    result = db.table("sessions").insert({
+    db = await get_db()
+    result = await db.table("sessions").insert({
         "model_assignments": session.model_assignments,
         "settings": session.settings,
     }).execute()
@@ -24,8 +24,8 @@ async def create_session(session: SessionCreate):
 
 @router.get("/{session_id}", response_model=Session)
 async def get_session(session_id: UUID):
-    db = get_db()
-    result = db.table("sessions").select("*").eq("id", str(session_id)).execute()
+    db = await get_db()
+    result = await db.table("sessions").select("*").eq("id", str(session_id)).execute()
 
     if not result.data:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -35,7 +35,7 @@ async def get_session(session_id: UUID):
 
 @router.patch("/{session_id}", response_model=Session)
 async def update_session(session_id: UUID, session: SessionUpdate):
-    db = get_db()
+    db = await get_db()
 
     update_data = {}
     if session.model_assignments is not None:
@@ -46,7 +46,7 @@ async def update_session(session_id: UUID, session: SessionUpdate):
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    result = db.table("sessions").update(update_data).eq("id", str(session_id)).execute()
+    result = await db.table("sessions").update(update_data).eq("id", str(session_id)).execute()
 
     if not result.data:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -56,7 +56,7 @@ async def update_session(session_id: UUID, session: SessionUpdate):
 
 @router.delete("/{session_id}")
 async def delete_session(session_id: UUID):
-    db = get_db()
-    result = db.table("sessions").delete().eq("id", str(session_id)).execute()
+    db = await get_db()
+    result = await db.table("sessions").delete().eq("id", str(session_id)).execute()
 
     return {"deleted": True}
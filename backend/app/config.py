@@ -5,16 +5,89 @@ class Settings(BaseSettings):
     # Supabase
     supabase_url: str = "http://localhost:54321"
     supabase_key: str = "your-anon-key"
+    supabase_pool_size: int = 20
+    supabase_timeout: float = 10.0
+    storage_bucket: str = "generations"
+    ingest_spool_max_size: int = 1024 * 1024
 
     # Ollama
     ollama_base_url: str = "http://localhost:11434"
+    ollama_base_urls: list[str] = []
+    ollama_timeout: float = 120.0
+    ollama_connect_timeout: float = 5.0
+    ollama_failure_threshold: int = 3
+    ollama_reset_timeout: float = 30.0
+    ollama_inventory_interval: float = 30.0
+    ollama_keep_alive: str = "10m"
+    ollama_max_loaded_models: int = 1
 
     # ComfyUI
     comfyui_base_url: str = "http://localhost:8188"
+    comfyui_base_urls: list[str] = []
+    comfyui_generation_timeout: float = 300.0
+    comfyui_max_concurrency: int = 2
+    comfyui_health_interval: float = 10.0
+    comfyui_probe_timeout: float = 2.0
+    generation_max_queue: int = 100
+    generation_max_batch_size: int = 8
+    generation_max_batch_images: int = 64
+    generation_memoize: bool = True
+    # Unfinished rows held by a process that stops renewing are recovered after this
+    generation_lease_seconds: float = 60.0
+
+    # Generation status writes
+    generation_progress_min_delta: int = 5
+    generation_progress_interval: float = 2.0
+    generation_status_flush_interval: float = 0.5
+
+    # Generation event streams
+    generation_events_queue_size: int = 256
+    generation_events_dsn: str = ""
+
+    # Specialist prompts
+    history_token_budget: int = 1024
+    model_history_budgets: dict[str, int] = {}
+    max_reused_context_tokens: int = 4096
+    summary_model: str = "llama3.2"
+    summary_max_words: int = 120
+    structured_output_retries: int = 2
+
+    # Specialist response cache (empty path keeps it in memory)
+    response_cache_enabled: bool = False
+    response_cache_path: str = ""
+    response_cache_max_entries: int = 1000
+    response_cache_ttl: float = 86400.0
+
+    # Orchestrators
+    orchestrator_cache_size: int = 1000
+    orchestrator_idle_ttl: float = 1800.0
+
+    # Chat event streams
+    sse_replay_buffer_size: int = 512
+    sse_buffer_cache_size: int = 1000
+    sse_disconnect_grace: float = 10.0
+    sse_coalesce_window: float = 0.04
+    sse_coalesce_max_chars: int = 2048
+
+    # Message persistence
+    message_write_batch_size: int = 50
+    message_write_flush_interval: float = 0.05
+    message_write_durability: str = "fire_and_forget"
+
+    # Observability
+    tracing_enabled: bool = False
 
     # App
     debug: bool = True
 
+    @property
+    def ollama_urls(self) -> list[str]:
+        return self.ollama_base_urls or [self.ollama_base_url]
+
+    @property
+    def comfyui_urls(self) -> list[str]:
+        return self.comfyui_base_urls or [self.comfyui_base_url]
+
     class Config:
         env_file = ".env"
 
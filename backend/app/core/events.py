@@ -0,0 +1,205 @@
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import suppress
+from typing import AsyncGenerator, AsyncIterator
+
+
+class EventBuffer:
+    """Bounded, numbered log of a conversation's recent stream events.
+
+    A round publishes into the buffer independently of any client, and each
+    SSE connection is just a subscriber that replays events after the id it
+    has already seen, so a reconnecting client resumes where it left off.
+    """
+
+    def __init__(self, max_events: int = 512, disconnect_grace: float = 10.0):
+        self._events: deque[tuple[int, dict]] = deque(maxlen=max_events)
+        self._last_id = 0
+        self._changed = asyncio.Condition()
+        self.active = False
+        self.task: asyncio.Task | None = None
+        # The running round is cancelled once it has had no subscriber for this long
+        self.disconnect_grace = disconnect_grace
+        self.subscribers = 0
+        self._abandon_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def start(self):
+        """Mark a round as in progress."""
+        self.active = True
+
+    async def finish(self):
+        """Mark the round as done and release waiting subscribers."""
+        async with self._changed:
+            self.active = False
+            self.task = None
+            self._changed.notify_all()
+
+    async def publish(self, event: dict) -> int:
+        async with self._changed:
+            self._last_id += 1
+            self._events.append((self._last_id, event))
+            self._changed.notify_all()
+        return self._last_id
+
+    async def subscribe(self, last_event_id: int = 0) -> AsyncGenerator[tuple[int | None, dict], None]:
+        """Yield (id, event) after `last_event_id` until the current round finishes.
+
+        If the requested events have already been dropped from the buffer, or
+        `last_event_id` is ahead of it, a single `resync` event (without id)
+        is yielded first, telling the client to refetch the message history.
+        """
+        self._subscriber_joined()
+        try:
+            async for item in self._replay(last_event_id):
+                yield item
+        finally:
+            self._subscriber_left()
+
+    async def _replay(self, last_event_id: int) -> AsyncGenerator[tuple[int | None, dict], None]:
+        cursor = last_event_id
+        # A new buffer (after a restart or eviction) numbers from 1 again, so a
+        # cursor past its last id refers to events it never held
+        stale = cursor > self._last_id
+        if stale:
+            cursor = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: stale or self._last_id > cursor or not self.active)
+                if self._events and cursor < self._events[0][0] - 1:
+                    missed = True
+                    cursor = self._events[0][0] - 1
+                else:
+                    missed = stale
+                stale = False
+                pending = [(event_id, event) for event_id, event in self._events if event_id > cursor]
+                if not pending and not missed and not self.active:
+                    return
+
+            if missed:
+                yield None, {"type": "resync"}
+            for event_id, event in pending:
+                cursor = event_id
+                yield event_id, event
+
+    def _subscriber_joined(self):
+        self.subscribers += 1
+        if self._abandon_handle is not None:
+            self._abandon_handle.cancel()
+            self._abandon_handle = None
+
+    def _subscriber_left(self):
+        self.subscribers -= 1
+        if self.subscribers == 0 and self.active and self.task is not None:
+            loop = asyncio.get_running_loop()
+            self._abandon_handle = loop.call_later(self.disconnect_grace, self._cancel_if_abandoned)
+
+    def _cancel_if_abandoned(self):
+        self._abandon_handle = None
+        if self.subscribers == 0 and self.task is not None:
+            self.task.cancel()
+
+
+class EventBufferStore:
+    """LRU-bounded map of conversation id to its event buffer."""
+
+    def __init__(self, max_size: int = 1000, max_events: int = 512, disconnect_grace: float = 10.0):
+        self.max_size = max_size
+        self.max_events = max_events
+        self.disconnect_grace = disconnect_grace
+        self._buffers: OrderedDict[str, EventBuffer] = OrderedDict()
+
+    def get(self, conversation_id: str) -> EventBuffer | None:
+        buffer = self._buffers.get(conversation_id)
+        if buffer is not None:
+            self._buffers.move_to_end(conversation_id)
+        return buffer
+
+    def get_or_create(self, conversation_id: str) -> EventBuffer:
+        buffer = self.get(conversation_id)
+        if buffer is None:
+            buffer = self._buffers[conversation_id] = EventBuffer(self.max_events, self.disconnect_grace)
+            self._evict()
+        return buffer
+
+    def _evict(self):
+        # Never drop a buffer whose round is still running, nor the newest one
+        for conversation_id in list(self._buffers)[:-1]:
+            if len(self._buffers) <= self.max_size:
+                break
+            if not self._buffers[conversation_id].active:
+                del self._buffers[conversation_id]
+
+
+async def coalesce_chunks(
+    events: AsyncIterator[dict],
+    window: float = 0.04,
+    max_chars: int = 2048,
+) -> AsyncGenerator[dict, None]:
+    """Merge specialist_chunk events per role.
+
+    Each role keeps its own buffer, since parallel rounds interleave roles
+    token by token. A role's merged chunk is emitted `window` seconds after
+    its first token or once it reaches `max_chars`; any other event flushes
+    every buffer first, so order relative to non-chunk events is preserved.
+    Merged chunks carry only type, role and content; the name is already
+    known from specialist_start.
+    """
+    if window <= 0:
+        async for event in events:
+            yield event
+        return
+
+    loop = asyncio.get_running_loop()
+    # Per role, in order of first token: [parts, size, deadline]
+    pending: dict[str, list] = {}
+
+    def flush(role: str) -> dict:
+        parts, _, _ = pending.pop(role)
+        return {"type": "specialist_chunk", "role": role, "content": "".join(parts)}
+
+    next_event = asyncio.ensure_future(events.__anext__())
+    try:
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, min(deadline for _, _, deadline in pending.values()) - loop.time())
+            done, _ = await asyncio.wait({next_event}, timeout=timeout)
+            if not done:
+                now = loop.time()
+                for role in [role for role, (_, _, deadline) in pending.items() if deadline <= now]:
+                    yield flush(role)
+                continue
+
+            try:
+                event = next_event.result()
+            except StopAsyncIteration:
+                break
+            next_event = asyncio.ensure_future(events.__anext__())
+
+            if event["type"] == "specialist_chunk":
+                role = event["role"]
+                if role not in pending:
+                    pending[role] = [[], 0, loop.time() + window]
+                buffer = pending[role]
+                buffer[0].append(event["content"])
+                buffer[1] += len(event["content"])
+                if buffer[1] >= max_chars:
+                    yield flush(role)
+                continue
+
+            for role in list(pending):
+                yield flush(role)
+            yield event
+
+        for role in list(pending):
+            yield flush(role)
+    finally:
+        # Make sure the source is no longer running before anyone closes it
+        if not next_event.done():
+            next_event.cancel()
+        with suppress(asyncio.CancelledError, StopAsyncIteration, Exception):
+            await next_event
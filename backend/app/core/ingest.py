@@ -0,0 +1,84 @@
+import hashlib
+import mimetypes
+import tempfile
+from pathlib import PurePosixPath
+from typing import AsyncGenerator
+
+from app.config import settings
+from app.services.comfyui import ComfyUIClient
+from app.services.storage import StorageClient
+
+CHUNK_SIZE = 256 * 1024
+
+
+def iter_output_files(outputs: dict) -> list[dict]:
+    """Flatten ComfyUI history outputs ({node: {"images": [...], "gifs": [...]}}) to file refs."""
+    files = []
+    for node_output in outputs.values():
+        for items in node_output.values():
+            if isinstance(items, list):
+                files.extend(item for item in items if isinstance(item, dict) and "filename" in item)
+    return files
+
+
+def split_batch_outputs(outputs: dict, batch_size: int) -> list[dict]:
+    """Split history outputs of a batched prompt into one outputs dict per batch index.
+
+    Output nodes list one file per latent in batch order; lists of any other
+    length (e.g. a single combined gif) stay with the first variant.
+    """
+    variants: list[dict] = [{} for _ in range(batch_size)]
+    for node_id, node_output in outputs.items():
+        for kind, items in node_output.items():
+            if isinstance(items, list) and len(items) == batch_size:
+                for index, item in enumerate(items):
+                    variants[index].setdefault(node_id, {})[kind] = [item]
+            else:
+                variants[0].setdefault(node_id, {})[kind] = items
+    return variants
+
+
+async def _read_spooled(spool) -> AsyncGenerator[bytes, None]:
+    spool.seek(0)
+    while chunk := spool.read(CHUNK_SIZE):
+        yield chunk
+
+
+async def ingest_outputs(comfyui: ComfyUIClient, storage: StorageClient, outputs: dict) -> list[dict]:
+    """Copy ComfyUI outputs into storage under content-addressed keys.
+
+    Each file is streamed from /view into a spooled temp file (kept in memory
+    only up to `ingest_spool_max_size`) while hashing, then streamed to storage
+    unless an object with the same hash already exists.
+    """
+    stored = []
+    for file in iter_output_files(outputs):
+        suffix = PurePosixPath(file["filename"]).suffix.lower()
+        content_type = mimetypes.guess_type(file["filename"])[0] or "application/octet-stream"
+
+        with tempfile.SpooledTemporaryFile(max_size=settings.ingest_spool_max_size) as spool:
+            digest = hashlib.sha256()
+            size = 0
+            async for chunk in comfyui.stream_image(
+                file["filename"],
+                file.get("subfolder", ""),
+                file.get("type", "output"),
+                chunk_size=CHUNK_SIZE,
+            ):
+                digest.update(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+
+            key = f"{digest.hexdigest()}{suffix}"
+            if not await storage.exists(key):
+                await storage.upload(key, _read_spooled(spool), content_type, size)
+
+        stored.append({
+            "filename": file["filename"],
+            "key": key,
+            "url": storage.public_url(key),
+            "content_type": content_type,
+            "size": size,
+        })
+
+    return stored
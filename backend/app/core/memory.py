@@ -0,0 +1,77 @@
+import asyncio
+
+from app.config import settings
+from app.services.ollama import get_ollama_client
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def history_budget(model: str) -> int:
+    """Token budget for conversation history in a prompt for `model`."""
+    return settings.model_history_budgets.get(model, settings.history_token_budget)
+
+
+def window_start(history: list[dict], budget: int, floor: int = 0) -> int:
+    """Index of the oldest message that still fits in `budget`, newest first.
+
+    The newest message is always kept, and the window never starts before `floor`.
+    """
+    used = 0
+    for i in range(len(history) - 1, floor - 1, -1):
+        used += estimate_tokens(history[i]["content"])
+        if used > budget and i < len(history) - 1:
+            return i + 1
+    return floor
+
+
+def format_history(history: list[dict]) -> str:
+    history_text = ""
+    for msg in history:
+        role_name = msg.get("role_name", msg["role"])
+        history_text += f"{role_name}: {msg['content']}\n"
+    return history_text
+
+
+class ConversationMemory:
+    """Token-budgeted history window with a rolling summary of older turns.
+
+    One instance per conversation. Turns that age out of a specialist's
+    window are folded into the summary, which is only recomputed when new
+    turns age out, and every specialist then sees summary + recent window.
+    """
+
+    def __init__(self, summary_model: str | None = None):
+        self.summary_model = summary_model or settings.summary_model
+        self.summary = ""
+        self.summarized_upto = 0
+        self._lock = asyncio.Lock()
+
+    async def window(self, history: list[dict], model: str) -> tuple[str, list[dict]]:
+        """Return (summary, recent messages) fitting the model's history budget."""
+        async with self._lock:
+            budget = history_budget(model) - estimate_tokens(self.summary)
+            start = window_start(history, budget, floor=min(self.summarized_upto, len(history)))
+            if start > self.summarized_upto:
+                self.summary = await self._summarize(history[self.summarized_upto:start])
+                self.summarized_upto = start
+            return self.summary, history[start:]
+
+    async def _summarize(self, messages: list[dict]) -> str:
+        prompt = f"""Existing summary:
+{self.summary or "(none)"}
+
+New messages:
+{format_history(messages)}
+
+Update the summary of this creative discussion in at most {settings.summary_max_words} words.
+Keep decisions about subject, style, composition, story and technical parameters."""
+
+        summary = ""
+        async for chunk in get_ollama_client().generate(model=self.summary_model, prompt=prompt):
+            summary += chunk.get("response", "")
+
+        # Safeguard against a model that ignores the word limit
+        return summary.strip()[:settings.summary_max_words * 8]
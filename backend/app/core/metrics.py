@@ -0,0 +1,201 @@
+import bisect
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from app.config import settings
+
+try:
+    from opentelemetry import trace
+except ImportError:  # Tracing is optional
+    trace = None
+
+# Latency buckets in seconds, from cache hits up to model loads and image runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        """Exposition lines for every label set, without HELP/TYPE headers."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # Per label set: non-cumulative bucket counts (+Inf last), sum, count
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text exposition format.
+
+    Updates are plain dict operations on the event loop thread, so recording
+    on hot paths costs about as much as a dict lookup.
+    """
+
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+OLLAMA_TTFT = histogram(
+    "ollama_time_to_first_token_seconds", "Time from request to first generated token.", ("model",),
+)
+OLLAMA_TOKENS_PER_SECOND = histogram(
+    "ollama_tokens_per_second", "Generation speed per request.", ("model",),
+    buckets=(1, 5, 10, 20, 40, 60, 80, 100, 150, 200, 400),
+)
+OLLAMA_ERRORS = counter("ollama_errors_total", "Failed Ollama generate requests.", ("model",))
+SPECIALIST_RESPONSE = histogram(
+    "specialist_response_seconds", "Duration of a specialist turn.", ("role",),
+)
+ORCHESTRATOR_ROUND = histogram(
+    "orchestrator_round_seconds", "Duration of an orchestration round.", ("phase", "mode"),
+)
+ORCHESTRATOR_PHASE = histogram(
+    "orchestrator_phase_seconds", "Time a conversation spent in a phase.", ("phase",),
+    buckets=(1, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+SUPABASE_REQUEST = histogram(
+    "supabase_request_seconds", "Supabase request latency until response headers.", ("table", "op"),
+)
+GENERATION_QUEUE_WAIT = histogram(
+    "generation_queue_wait_seconds", "Time a generation job waited for a scheduler worker.", ("priority",),
+)
+GENERATION_RUN = histogram(
+    "generation_run_seconds", "Duration of a generation run on ComfyUI.", ("status",),
+)
+GENERATION_LEASE_RENEWAL_FAILURES = counter(
+    "generation_lease_renewal_failures_total", "Failed renewals of this worker's generation leases.",
+)
+COMFYUI_HISTORY_POLLS = counter(
+    "comfyui_history_polls_total", "History polls made while waiting for ComfyUI events.",
+)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record an OpenTelemetry span when tracing is enabled and installed.
+
+    Spans are not made current: they are also opened inside async generators,
+    where a context switch across yields would detach the wrong context.
+    """
+    if trace is None or not settings.tracing_enabled:
+        yield None
+        return
+
+    current = trace.get_tracer("viogen").start_span(name, attributes=attributes)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_exception(e)
+        raise
+    finally:
+        current.end()
+
@@ -1,6 +1,12 @@
+import asyncio
+import time
 from typing import AsyncGenerator
 
+from app.config import settings
+from app.core.memory import ConversationMemory
+from app.core.metrics import ORCHESTRATOR_PHASE, ORCHESTRATOR_ROUND, span
 from app.core.phases import Phase, PHASE_SPECIALISTS, get_next_phase
+from app.services.ollama import get_ollama_client
 from app.core.specialists import (
     StyleSpecialist,
     CompositionSpecialist,
@@ -10,13 +16,28 @@ from app.core.specialists import (
 )
 
 
+EXECUTION_MODES = ("sequential", "parallel")
+
+
 class Orchestrator:
-    def __init__(self, model_assignments: dict[str, str]):
+    def __init__(self, model_assignments: dict[str, str], execution_mode: str = "sequential"):
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+
         self.model_assignments = model_assignments
+        self.execution_mode = execution_mode
         self.current_phase = Phase.IDEATION
         self.conversation_history: list[dict] = []
         self.round_count = 0
         self.max_rounds_per_phase = 3
+        self.memory = ConversationMemory()
+        # When this process saw the current phase begin, for phase duration metrics
+        self._phase_started = time.monotonic()
+        # Model Ollama most likely has loaded, and the background prewarm of the next round
+        self._last_model: str | None = None
+        self._prewarm_task: asyncio.Task | None = None
+        # Partial replies of specialists still streaming in the current round
+        self._in_flight: dict[str, str] = {}
 
         # Initialize specialists
         self.specialists = {
@@ -32,6 +53,8 @@ class Orchestrator:
         message: str,
     ) -> AsyncGenerator[dict, None]:
         """Process a user message and stream specialist responses."""
+        self._in_flight.clear()
+
         # Add user message to history
         self.conversation_history.append({
             "role": "user",
@@ -47,9 +70,79 @@ class Orchestrator:
         # Get specialists for current phase
         active_specialists = PHASE_SPECIALISTS.get(self.current_phase, [])
 
-        # Each specialist responds
-        for role in active_specialists:
+        if self.execution_mode == "parallel" and len(active_specialists) > 1:
+            run_specialists = self._run_parallel
+        else:
+            run_specialists = self._run_sequential
+
+        phase = self.current_phase.value
+        started = time.perf_counter()
+        try:
+            with span("orchestrator.round", phase=phase, mode=self.execution_mode, round=self.round_count):
+                async for event in run_specialists(message, active_specialists):
+                    yield event
+        finally:
+            # Cancelled and failed rounds are recorded too
+            ORCHESTRATOR_ROUND.observe(time.perf_counter() - started, phase=phase, mode=self.execution_mode)
+
+        self.round_count += 1
+
+        # Check if we should advance phase
+        if self.round_count >= self.max_rounds_per_phase:
+            self.advance_phase()
+            yield {
+                "type": "phase_change",
+                "phase": self.current_phase.value,
+            }
+
+        # Load the next round's first models while the user reads this one
+        self._schedule_prewarm()
+
+    def _model_groups(self, roles: list[str]) -> list[list[str]]:
+        """Group roles by model, starting with the model Ollama has loaded."""
+        groups: dict[str, list[str]] = {}
+        for role in roles:
+            groups.setdefault(self.specialists[role].model, []).append(role)
+        if self._last_model in groups:
+            groups = {self._last_model: groups.pop(self._last_model), **groups}
+        return list(groups.values())
+
+    def _schedule_prewarm(self):
+        roles = PHASE_SPECIALISTS.get(self.current_phase, [])
+        # Only the models the next round starts with; warming more would evict them again
+        models = [self.specialists[group[0]].model for group in self._model_groups(roles)]
+        models = [model for model in models[:settings.ollama_max_loaded_models] if model != self._last_model]
+        if not models:
+            return
+        if self._prewarm_task is not None and not self._prewarm_task.done():
+            return
+        self._prewarm_task = asyncio.create_task(self._prewarm(models))
+
+    async def _prewarm(self, models: list[str]):
+        client = get_ollama_client()
+        for model in models:
+            try:
+                await client.prewarm(model)
+            except Exception:
+                # Prewarming is an optimization only
+                pass
+
+    async def _run_sequential(
+        self,
+        message: str,
+        roles: list[str],
+    ) -> AsyncGenerator[dict, None]:
+        """Run specialists one after another, each seeing the previous replies.
+
+        Specialists sharing a model run back to back so Ollama swaps models
+        as rarely as possible. This execution order, not the phase order, is
+        what later specialists see and what history and the messages table
+        record: with style and story on one model and composition on another,
+        story replies before composition and without seeing its reply.
+        """
+        for role in [role for group in self._model_groups(roles) for role in group]:
             specialist = self.specialists[role]
+            self._last_model = specialist.model
 
             yield {
                 "type": "specialist_start",
@@ -58,8 +151,9 @@ class Orchestrator:
             }
 
             full_response = ""
-            async for chunk in specialist.respond(message, self.conversation_history):
+            async for chunk in specialist.respond(message, self.conversation_history, self.memory):
                 full_response += chunk
+                self._in_flight[role] = full_response
                 yield {
                     "type": "specialist_chunk",
                     "role": role,
@@ -68,31 +162,172 @@ class Orchestrator:
                 }
 
             # Add to history
+            self._in_flight.pop(role, None)
             self.conversation_history.append({
                 "role": role,
                 "role_name": specialist.name,
                 "content": full_response,
             })
 
-            yield {
-                "type": "specialist_end",
+            yield self._end_event(role, full_response)
+
+    async def _run_parallel(
+        self,
+        message: str,
+        roles: list[str],
+    ) -> AsyncGenerator[dict, None]:
+        """Run specialists concurrently and multiplex their events.
+
+        Every specialist sees the history as it was at the start of the round.
+        Finished replies are appended to history in phase order once the round
+        ends, including when it is interrupted. If the round needs more models
+        than Ollama keeps loaded at once, specialists run concurrently per
+        model group, one group after another.
+        """
+        history = list(self.conversation_history)
+        queue: asyncio.Queue = asyncio.Queue()
+        responses: dict[str, str] = {}
+        done = object()
+
+        async def run(role: str):
+            specialist = self.specialists[role]
+            try:
+                await queue.put({
+                    "type": "specialist_start",
+                    "role": role,
+                    "name": specialist.name,
+                })
+
+                full_response = ""
+                async for chunk in specialist.respond(message, history, self.memory):
+                    full_response += chunk
+                    self._in_flight[role] = full_response
+                    await queue.put({
+                        "type": "specialist_chunk",
+                        "role": role,
+                        "name": specialist.name,
+                        "content": chunk,
+                    })
+
+                self._in_flight.pop(role, None)
+                responses[role] = full_response
+                await queue.put(self._end_event(role, full_response))
+            except Exception as e:
+                await queue.put(e)
+            finally:
+                await queue.put(done)
+
+        groups = self._model_groups(roles)
+        if len(groups) <= settings.ollama_max_loaded_models:
+            groups = [[role for group in groups for role in group]]
+
+        tasks: list[asyncio.Task] = []
+        try:
+            for group in groups:
+                tasks = [asyncio.create_task(run(role)) for role in group]
+                self._last_model = self.specialists[group[-1]].model
+                remaining = len(tasks)
+                while remaining:
+                    item = await queue.get()
+                    if item is done:
+                        remaining -= 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            for role in roles:
+                if role in responses:
+                    self.conversation_history.append({
+                        "role": role,
+                        "role_name": self.specialists[role].name,
+                        "content": responses[role],
+                    })
+
+    def _end_event(self, role: str, content: str) -> dict:
+        specialist = self.specialists[role]
+        event = {
+            "type": "specialist_end",
+            "role": role,
+            "name": specialist.name,
+            "content": content,
+        }
+        # Validated parameters from specialists with structured output (Technical)
+        if specialist.structured_output is not None:
+            event["parameters"] = specialist.structured_output.model_dump()
+        return event
+
+    def truncate_round(self) -> list[dict]:
+        """Move partial replies of an interrupted round into history.
+
+        Returns the truncated history entries so the caller can persist them.
+        """
+        truncated = []
+        for role, content in self._in_flight.items():
+            if not content:
+                continue
+            entry = {
                 "role": role,
-                "name": specialist.name,
-                "content": full_response,
+                "role_name": self.specialists[role].name,
+                "content": content,
+                "truncated": True,
             }
+            self.conversation_history.append(entry)
+            truncated.append(entry)
+        self._in_flight.clear()
+        return truncated
 
-        self.round_count += 1
+    def snapshot(self, include_history: bool = True) -> dict:
+        """Serialize phase/round state and the rolling summary (and optionally history) to a compact dict.
 
-        # Check if we should advance phase
-        if self.round_count >= self.max_rounds_per_phase:
-            self.advance_phase()
-            yield {
-                "type": "phase_change",
-                "phase": self.current_phase.value,
-            }
+        The summary is always included: rebuilding it from history loaded
+        elsewhere would mean re-summarizing every aged-out turn.
+        """
+        state = {
+            "phase": self.current_phase.value,
+            "round_count": self.round_count,
+            "summary": [self.memory.summary, self.memory.summarized_upto],
+        }
+        if include_history:
+            state["history"] = [
+                [msg["role"], msg["role_name"], msg["content"]]
+                for msg in self.conversation_history
+            ]
+        return state
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        model_assignments: dict[str, str],
+        state: dict,
+        history: list[dict] | None = None,
+        execution_mode: str = "sequential",
+    ) -> "Orchestrator":
+        """Rebuild an orchestrator from a snapshot, optionally with history loaded elsewhere."""
+        orchestrator = cls(model_assignments, execution_mode=execution_mode)
+        orchestrator.current_phase = Phase(state.get("phase", Phase.IDEATION.value))
+        orchestrator.round_count = state.get("round_count", 0)
+        if history is not None:
+            orchestrator.conversation_history = history
+        else:
+            orchestrator.conversation_history = [
+                {"role": role, "role_name": role_name, "content": content}
+                for role, role_name, content in state.get("history", [])
+            ]
+        summary, summarized_upto = state.get("summary", ["", 0])
+        orchestrator.memory.summary = summary
+        orchestrator.memory.summarized_upto = min(summarized_upto, len(orchestrator.conversation_history))
+        return orchestrator
 
     def advance_phase(self):
         """Move to the next phase."""
+        now = time.monotonic()
+        ORCHESTRATOR_PHASE.observe(now - self._phase_started, phase=self.current_phase.value)
+        self._phase_started = now
         self.current_phase = get_next_phase(self.current_phase)
         self.round_count = 0
 
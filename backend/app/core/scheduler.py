@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from app.core.metrics import GENERATION_LEASE_RENEWAL_FAILURES, GENERATION_QUEUE_WAIT
+from app.services.generation_events import get_generation_events
+from app.services.supabase import get_async_supabase_client
+
+logger = logging.getLogger(__name__)
+
+# Lower rank is served first
+PRIORITY_LANES = {"interactive": 0, "batch": 1}
+
+UNFINISHED_STATUSES = ["queued", "running"]
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler cannot accept more queued jobs."""
+
+
+@dataclass(order=True)
+class GenerationJob:
+    rank: int
+    sequence: int
+    generation_id: str = field(compare=False)
+    workflow: dict = field(compare=False)
+    # Further generation rows fanned out from the same batched prompt, by batch index
+    variant_ids: list[str] = field(default_factory=list, compare=False)
+    submitted_at: float = field(default_factory=time.monotonic, compare=False)
+
+
+class GenerationScheduler:
+    """Bounded-concurrency priority queue for ComfyUI generation jobs.
+
+    A fixed number of workers pull jobs, interactive lane first, so no more
+    than `concurrency` workflows run against ComfyUI at once. Jobs are not
+    persisted separately: the generations table is the source of truth.
+
+    Each queued/running row carries a lease held by the process that queued
+    it, renewed while the process is alive. Recovery only claims rows whose
+    lease has expired, so several API workers can share one database without
+    re-running each other's jobs.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[str, dict], Awaitable[None]],
+        concurrency: int = 2,
+        max_queue: int = 100,
+        lease_seconds: float = 60.0,
+    ):
+        self.runner = runner
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.running = 0
+        self._heap: list[GenerationJob] = []
+        self._sequence = itertools.count()
+        self._not_empty = asyncio.Condition()
+        self._workers: list[asyncio.Task] = []
+        self._lease_task: asyncio.Task | None = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._heap)
+
+    def is_saturated(self) -> bool:
+        return self.queued >= self.max_queue
+
+    async def submit(
+        self,
+        generation_id: str,
+        workflow: dict,
+        priority: str = "interactive",
+        force: bool = False,
+        variant_ids: list[str] | None = None,
+    ) -> int:
+        """Queue a job and return how many queued jobs are ahead of it."""
+        if priority not in PRIORITY_LANES:
+            raise ValueError(f"Unknown priority: {priority}")
+        if not force and self.is_saturated():
+            raise QueueFullError("Generation queue is full")
+
+        job = GenerationJob(
+            PRIORITY_LANES[priority],
+            next(self._sequence),
+            generation_id,
+            workflow,
+            list(variant_ids or []),
+        )
+        async with self._not_empty:
+            heapq.heappush(self._heap, job)
+            self._not_empty.notify()
+        return sum(1 for other in self._heap if other < job)
+
+    def lease(self) -> dict:
+        """Columns marking a new queued row as held by this process."""
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+        return {"worker_id": self.worker_id, "lease_expires_at": expires_at.isoformat()}
+
+    async def start(self, recover: bool = True):
+        if recover:
+            await self.recover()
+            self._lease_task = asyncio.create_task(self._lease_loop())
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        tasks = [*self._workers, *([self._lease_task] if self._lease_task else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._lease_task = None
+
+    async def renew_leases(self):
+        """Extend the lease on every unfinished row this process holds."""
+        db = await get_async_supabase_client()
+        await db.table("generations")\
+            .update({"lease_expires_at": self.lease()["lease_expires_at"]})\
+            .eq("worker_id", self.worker_id)\
+            .in_("status", UNFINISHED_STATUSES)\
+            .execute()
+
+    async def recover(self):
+        """Claim and re-queue unfinished generations whose lease has expired.
+
+        Rows of one batched prompt are claimed and re-queued together as a
+        single job. The claim is a conditional update, so when several
+        processes recover at once each row goes to exactly one of them.
+        """
+        db = await get_async_supabase_client()
+        expired = f'lease_expires_at.is.null,lease_expires_at.lt."{datetime.now(timezone.utc).isoformat()}"'
+        result = await db.table("generations")\
+            .select("id, conversation_id, workflow_json, parameters, priority")\
+            .in_("status", UNFINISHED_STATUSES)\
+            .or_(expired)\
+            .order("created_at")\
+            .execute()
+
+        jobs: dict[str, list[dict]] = {}
+        for row in result.data:
+            if not row.get("workflow_json"):
+                continue
+            batch_id = (row.get("parameters") or {}).get("batch_id") or row["id"]
+            jobs.setdefault(batch_id, []).append(row)
+
+        for batch_id, rows in jobs.items():
+            claimed = await db.table("generations")\
+                .update({"status": "queued", "progress": 0, **self.lease()})\
+                .in_("id", [row["id"] for row in rows])\
+                .in_("status", UNFINISHED_STATUSES)\
+                .or_(expired)\
+                .execute()
+            claimed_ids = {row["id"] for row in claimed.data or []}
+            rows = [row for row in rows if row["id"] in claimed_ids]
+            if not rows:
+                continue
+
+            for row in rows:
+                if row.get("conversation_id"):
+                    get_generation_events().track(row["id"], row["conversation_id"])
+            rows.sort(key=lambda row: (row.get("parameters") or {}).get("batch_index", 0))
+            # Rows from before priorities were stored: batches ran in the batch lane
+            priority = rows[0].get("priority") or ("batch" if batch_id != rows[0]["id"] else "interactive")
+            await self.submit(
+                rows[0]["id"],
+                rows[0]["workflow_json"],
+                priority,
+                force=True,
+                variant_ids=[row["id"] for row in rows[1:]],
+            )
+
+    async def _lease_loop(self):
+        """Keep this process's leases alive and pick up rows whose holder died."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.renew_leases()
+            except Exception:
+                # Retried next tick; once the lease lapses other workers re-run these jobs
+                GENERATION_LEASE_RENEWAL_FAILURES.inc()
+                logger.warning("Renewing generation leases for %s failed", self.worker_id, exc_info=True)
+            try:
+                await self.recover()
+            except Exception:
+                logger.warning("Recovering expired generation leases failed", exc_info=True)
+
+    async def _worker(self):
+        while True:
+            async with self._not_empty:
+                while not self._heap:
+                    await self._not_empty.wait()
+                job = heapq.heappop(self._heap)
+
+            lane = next(name for name, rank in PRIORITY_LANES.items() if rank == job.rank)
+            GENERATION_QUEUE_WAIT.observe(time.monotonic() - job.submitted_at, priority=lane)
+            self.running += 1
+            try:
+                if job.variant_ids:
+                    await self.runner(job.generation_id, job.workflow, job.variant_ids)
+                else:
+                    await self.runner(job.generation_id, job.workflow)
+            except Exception:
+                # The runner records its own failures on the generation row
+                pass
+            finally:
+                self.running -= 1
@@ -1,7 +1,12 @@
+import time
 from abc import ABC, abstractmethod
 from typing import AsyncGenerator
 
+from app.config import settings
+from app.core.memory import ConversationMemory, format_history, history_budget, window_start
+from app.core.metrics import SPECIALIST_RESPONSE, span
 from app.services.ollama import get_ollama_client
+from app.services.response_cache import cache_key, get_response_cache, replay_chunks
 
 
 class BaseSpecialist(ABC):
@@ -9,36 +14,138 @@ class BaseSpecialist(ABC):
     name: str = ""
     system_prompt: str = ""
 
-    def __init__(self, model: str):
+    def __init__(self, model: str, options: dict | None = None):
         self.model = model
+        # Ollama sampling options (temperature, seed, ...)
+        self.options = options or {}
+        # Validated structured result of the last turn, for specialists that produce one
+        self.structured_output = None
         self._client = get_ollama_client()
 
-    def _build_prompt(self, user_message: str, conversation_history: list[dict]) -> str:
-        """Build prompt with conversation context."""
+        # KV context returned by Ollama for this specialist's last turn
+        self._context: list | None = None
+        self._context_model: str | None = None
+        self._context_history_len = 0
+
+    def _build_prompt(self, user_message: str, conversation_history: list[dict], summary: str = "") -> str:
+        """Build prompt with (already windowed) conversation context."""
+        history_text = format_history(conversation_history)
+        if summary:
+            history_text = f"Summary of earlier discussion: {summary}\n\n{history_text}"
+
+        return f"""Previous conversation:
+{history_text}
+
+Current request: {user_message}
+
+Respond as {self.name}, focusing on your specialty."""
+
+    async def _build_windowed_prompt(
+        self,
+        user_message: str,
+        conversation_history: list[dict],
+        memory: ConversationMemory | None = None,
+    ) -> str:
+        # Budget history by tokens; without memory older turns are simply dropped
+        if memory is not None:
+            summary, recent = await memory.window(conversation_history, self.model)
+        else:
+            summary = ""
+            recent = conversation_history[window_start(conversation_history, history_budget(self.model)):]
+        return self._build_prompt(user_message, recent, summary)
+
+    def _build_delta_prompt(self, user_message: str, conversation_history: list[dict]) -> str:
+        """Build prompt with only the messages not yet in the cached context."""
         history_text = ""
-        for msg in conversation_history[-10:]:  # Last 10 messages for context
+        for msg in conversation_history[self._context_history_len:]:
+            if msg["role"] == self.role:  # Own replies are already in the context
+                continue
             role_name = msg.get("role_name", msg["role"])
             history_text += f"{role_name}: {msg['content']}\n"
 
-        return f"""Previous conversation:
+        return f"""New messages:
 {history_text}
 
 Current request: {user_message}
 
 Respond as {self.name}, focusing on your specialty."""
 
+    def _can_reuse_context(self, conversation_history: list[dict]) -> bool:
+        return (
+            self._context is not None
+            and self._context_model == self.model
+            and len(conversation_history) >= self._context_history_len
+            and len(self._context) <= settings.max_reused_context_tokens
+        )
+
+    def reset_context(self):
+        """Drop the cached context so the next turn sends the full prompt."""
+        self._context = None
+        self._context_model = None
+        self._context_history_len = 0
+
     async def respond(
         self,
         user_message: str,
         conversation_history: list[dict],
+        memory: ConversationMemory | None = None,
     ) -> AsyncGenerator[str, None]:
         """Generate streaming response."""
-        prompt = self._build_prompt(user_message, conversation_history)
+        self.structured_output = None
+        started = time.perf_counter()
+        try:
+            with span("specialist.respond", role=self.role, model=self.model):
+                async for text in self._generate(user_message, conversation_history, memory):
+                    yield text
+        finally:
+            SPECIALIST_RESPONSE.observe(time.perf_counter() - started, role=self.role)
+
+    async def _generate(
+        self,
+        user_message: str,
+        conversation_history: list[dict],
+        memory: ConversationMemory | None = None,
+    ) -> AsyncGenerator[str, None]:
+        if self._can_reuse_context(conversation_history):
+            prompt = self._build_delta_prompt(user_message, conversation_history)
+            context = self._context
+        else:
+            prompt = await self._build_windowed_prompt(user_message, conversation_history, memory)
+            context = None
 
+        # Cleared until this turn completes, so an interrupted turn falls back to the full prompt
+        self.reset_context()
+        history_len = len(conversation_history)
+
+        # Only full prompts are cacheable; a delta prompt depends on the KV context
+        cache = get_response_cache() if context is None else None
+        key = cache_key(self.model, self.system_prompt, prompt, self.options) if cache else None
+        if cache is not None:
+            cached = await cache.get(key)
+            if cached is not None:
+                for text in replay_chunks(cached["response"]):
+                    yield text
+                self._remember_context(cached.get("context"), history_len)
+                return
+
+        full_response = ""
         async for chunk in self._client.generate(
             model=self.model,
             prompt=prompt,
             system=self.system_prompt,
+            context=context,
+            options=self.options or None,
         ):
             if chunk.get("response"):
+                full_response += chunk["response"]
                 yield chunk["response"]
+            if chunk.get("done"):
+                self._remember_context(chunk.get("context"), history_len)
+                if cache is not None:
+                    await cache.set(key, {"response": full_response, "context": chunk.get("context")})
+
+    def _remember_context(self, context: list | None, history_len: int):
+        if context:
+            self._context = context
+            self._context_model = self.model
+            self._context_history_len = history_len
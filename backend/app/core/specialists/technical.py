@@ -1,3 +1,12 @@
+import json
+from typing import AsyncGenerator
+
+from pydantic import ValidationError
+
+from app.config import settings
+from app.core.memory import ConversationMemory
+from app.models.generation import WorkflowParameters
+from app.workflows.builder import parse_technical_parameters
 from .base import BaseSpecialist
 
 
@@ -25,3 +34,71 @@ When responding:
 - Keep responses technical but accessible (2-4 sentences)
 
 You're collaborating with Luna (style), Frame (composition), Saga (story), and Lens (critic)."""
+
+    structured_instructions = """
+
+Answer with a single JSON object only. Put the final image prompt in "prompt",
+the generation settings in the other fields, and a 2-4 sentence explanation
+for the team in "notes"."""
+
+    async def _generate(
+        self,
+        user_message: str,
+        conversation_history: list[dict],
+        memory: ConversationMemory | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Generate validated workflow parameters and stream a readable summary of them."""
+        self.structured_output = await self.generate_parameters(user_message, conversation_history, memory)
+        yield self.format_parameters(self.structured_output)
+
+    async def generate_parameters(
+        self,
+        user_message: str,
+        conversation_history: list[dict],
+        memory: ConversationMemory | None = None,
+    ) -> WorkflowParameters:
+        """Ask for schema-constrained JSON, retrying (bounded) when validation fails."""
+        # Structured turns do not continue a free-text KV context
+        self.reset_context()
+        base_prompt = await self._build_windowed_prompt(user_message, conversation_history, memory)
+        schema = WorkflowParameters.model_json_schema()
+
+        prompt = base_prompt
+        text = ""
+        for _ in range(settings.structured_output_retries + 1):
+            text = ""
+            async for chunk in self._client.generate(
+                model=self.model,
+                prompt=prompt,
+                system=self.system_prompt + self.structured_instructions,
+                options={**self.options, "temperature": 0},
+                format=schema,
+            ):
+                text += chunk.get("response", "")
+
+            try:
+                return WorkflowParameters.model_validate_json(text)
+            except ValidationError as e:
+                prompt = f"""{base_prompt}
+
+Your previous answer was invalid:
+{text}
+
+Errors: {json.dumps(e.errors(include_url=False, include_context=False), default=str)}
+Reply again with corrected JSON only."""
+
+        # Out of retries: fall back to scanning the text, then to defaults
+        try:
+            return WorkflowParameters(prompt=user_message, **parse_technical_parameters(text))
+        except ValidationError:
+            return WorkflowParameters(prompt=user_message)
+
+    @staticmethod
+    def format_parameters(parameters: WorkflowParameters) -> str:
+        settings_line = (
+            f"{parameters.width}x{parameters.height}, {parameters.steps} steps, "
+            f"CFG {parameters.cfg:g}, {parameters.sampler} sampler"
+        )
+        if parameters.notes:
+            return f"{parameters.notes}\n\nSettings: {settings_line}\nPrompt: {parameters.prompt}"
+        return f"Settings: {settings_line}\nPrompt: {parameters.prompt}"
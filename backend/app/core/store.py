@@ -0,0 +1,52 @@
+import time
+from collections import OrderedDict
+
+from app.core.orchestrator import Orchestrator
+
+
+class OrchestratorStore:
+    """In-process LRU cache of live orchestrators with idle-TTL eviction.
+
+    The store only bounds memory; durable state lives in the database as an
+    orchestrator snapshot plus the messages table, so an evicted (or never
+    seen, e.g. on another worker) conversation can be rehydrated lazily.
+    """
+
+    def __init__(self, max_size: int = 1000, idle_ttl: float = 1800.0):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._entries: OrderedDict[str, tuple[Orchestrator, float]] = OrderedDict()
+
+    def get(self, conversation_id: str) -> Orchestrator | None:
+        self._evict_expired()
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return None
+        self._entries[conversation_id] = (entry[0], time.monotonic())
+        self._entries.move_to_end(conversation_id)
+        return entry[0]
+
+    def put(self, conversation_id: str, orchestrator: Orchestrator):
+        self._entries[conversation_id] = (orchestrator, time.monotonic())
+        self._entries.move_to_end(conversation_id)
+        self._evict_expired()
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, conversation_id: str):
+        self._entries.pop(conversation_id, None)
+
+    def _evict_expired(self):
+        # Entries are kept in access order, so expired ones are always at the front
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._entries:
+            _, (_, last_used) = next(iter(self._entries.items()))
+            if last_used > cutoff:
+                break
+            self._entries.popitem(last=False)
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return self.get(conversation_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
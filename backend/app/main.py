@@ -1,13 +1,44 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.config import settings
 from app.api.routes import sessions, chat, generations
+from app.core.metrics import REGISTRY
+from app.services.comfyui import close_comfyui_pool
+from app.services.generation_events import close_generation_events, get_generation_events
+from app.services.generation_status import close_status_writer
+from app.services.message_writer import close_message_writer
+from app.services.ollama import close_ollama_client
+from app.services.response_cache import get_response_cache
+from app.services.storage import close_storage_client
+from app.services.supabase import close_async_supabase_client
+from app.workflows.builder import get_template_registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_template_registry()
+    await get_generation_events().start()
+    await generations.scheduler.start()
+    yield
+    await generations.scheduler.stop()
+    await close_status_writer()
+    await close_generation_events()
+    await close_message_writer()
+    await close_comfyui_pool()
+    await close_ollama_client()
+    await close_storage_client()
+    await close_async_supabase_client()
+
 
 app = FastAPI(
     title="Creative Studio API",
     description="Multi-model orchestration for image/video generation",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -26,4 +57,14 @@ app.include_router(generations.router, prefix="/api")
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "debug": settings.debug}
+    health = {"status": "healthy", "debug": settings.debug}
+    cache = get_response_cache()
+    if cache is not None:
+        health["response_cache"] = cache.stats()
+    return health
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -1,11 +1,11 @@
 from .session import Session, SessionCreate, SessionUpdate
 from .conversation import Conversation, ConversationCreate
 from .message import Message, MessageCreate
-from .generation import Generation, GenerationCreate
+from .generation import Generation, GenerationBatchCreate, GenerationCreate, WorkflowParameters
 
 __all__ = [
     "Session", "SessionCreate", "SessionUpdate",
     "Conversation", "ConversationCreate",
     "Message", "MessageCreate",
-    "Generation", "GenerationCreate",
+    "Generation", "GenerationBatchCreate", "GenerationCreate", "WorkflowParameters",
 ]
@@ -1,7 +1,8 @@
 from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class GenerationCreate(BaseModel):
@@ -9,6 +10,23 @@ class GenerationCreate(BaseModel):
     prompt: str
     negative_prompt: str = "ugly, blurry, low quality"
     parameters: dict = {}
+    priority: Literal["interactive", "batch"] = "interactive"
+
+
+class GenerationBatchCreate(BaseModel):
+    """A seed sweep or parameter grid, packed into batched ComfyUI prompts.
+
+    Every combination of `grid` values (applied over `parameters`) and `seeds`
+    becomes one prompt producing `batch_size` images, one generation row each.
+    """
+    conversation_id: UUID
+    prompt: str
+    negative_prompt: str = "ugly, blurry, low quality"
+    parameters: dict = {}
+    grid: dict[str, list] = {}
+    seeds: list[int] = []
+    batch_size: int = Field(1, ge=1)
+    priority: Literal["interactive", "batch"] = "batch"
 
 
 class Generation(BaseModel):
@@ -18,8 +36,23 @@ class Generation(BaseModel):
     parameters: dict
     status: str
     progress: int
+    outputs: list[dict] = []
+    workflow_hash: str | None = None
     error: str | None
     created_at: datetime
+    queue_position: int | None = None
 
     class Config:
         from_attributes = True
+
+
+class WorkflowParameters(BaseModel):
+    """txt2img parameters produced by the Technical specialist."""
+    prompt: str
+    negative_prompt: str = "ugly, blurry, low quality"
+    width: int = Field(1024, ge=256, le=2048, multiple_of=8)
+    height: int = Field(1024, ge=256, le=2048, multiple_of=8)
+    steps: int = Field(20, ge=10, le=150)
+    cfg: float = Field(7.0, ge=1, le=30)
+    sampler: Literal["euler", "euler_ancestral", "dpmpp_2m", "ddim", "heun"] = "euler"
+    notes: str = ""
@@ -1,16 +1,35 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import AsyncGenerator
+
 import httpx
+import websockets
 
 from app.config import settings
+from app.core.metrics import COMFYUI_HISTORY_POLLS
+
+logger = logging.getLogger(__name__)
 
 
 class ComfyUIClient:
+    # Fallback history polling backs off between these bounds while no events arrive
+    min_poll_interval = 1.0
+    max_poll_interval = 10.0
+
     def __init__(self, base_url: str | None = None):
         self.base_url = base_url or settings.comfyui_base_url
+        self.ws_url = self.base_url.replace("http", "ws", 1).rstrip("/") + "/ws"
+        self.client_id = uuid.uuid4().hex
+        self.events_connected = False
         self._client = httpx.AsyncClient(base_url=self.base_url, timeout=300.0)
+        self._events_task: asyncio.Task | None = None
+        self._watchers: dict[str, asyncio.Queue] = {}
 
     async def queue_workflow(self, workflow: dict) -> str:
         """Queue a workflow and return the prompt ID."""
-        response = await self._client.post("/prompt", json={"prompt": workflow})
+        response = await self._client.post("/prompt", json={"prompt": workflow, "client_id": self.client_id})
         response.raise_for_status()
         return response.json()["prompt_id"]
 
@@ -27,30 +46,257 @@ class ComfyUIClient:
         response.raise_for_status()
         return response.content
 
+    async def stream_image(
+        self,
+        filename: str,
+        subfolder: str = "",
+        folder_type: str = "output",
+        chunk_size: int = 256 * 1024,
+    ) -> AsyncGenerator[bytes, None]:
+        """Stream generated output data in chunks."""
+        params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+        async with self._client.stream("GET", "/view", params=params) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
     async def check_health(self) -> bool:
         """Check if ComfyUI is running."""
         try:
-            response = await self._client.get("/system_stats")
+            # Probes get a short timeout: a hung backend must not stall routing
+            response = await self._client.get("/system_stats", timeout=settings.comfyui_probe_timeout)
             return response.status_code == 200
         except httpx.RequestError:
             return False
 
+    async def get_queue_depth(self) -> int:
+        """Get the number of running and pending prompts on this instance."""
+        response = await self._client.get("/queue", timeout=settings.comfyui_probe_timeout)
+        response.raise_for_status()
+        queue = response.json()
+        return len(queue.get("queue_running", [])) + len(queue.get("queue_pending", []))
+
     async def get_progress(self, prompt_id: str) -> dict:
         """Poll for generation progress."""
+        COMFYUI_HISTORY_POLLS.inc()
         history = await self.get_history(prompt_id)
         if prompt_id in history:
-            return {"status": "complete", "outputs": history[prompt_id].get("outputs", {})}
+            entry = history[prompt_id]
+            if entry.get("status", {}).get("status_str") == "error":
+                return {"status": "failed", "error": "Generation failed in ComfyUI"}
+            return {"status": "complete", "outputs": entry.get("outputs", {})}
         return {"status": "running", "progress": 0}
 
+    def start_events(self):
+        """Start the shared websocket listener if it is not already running."""
+        if self._events_task is None or self._events_task.done():
+            self._events_task = asyncio.create_task(self._listen_events())
+
+    async def _listen_events(self):
+        delay = 1.0
+        while True:
+            try:
+                async with websockets.connect(f"{self.ws_url}?clientId={self.client_id}", max_size=None) as ws:
+                    self.events_connected = True
+                    delay = 1.0
+                    async for raw in ws:
+                        if isinstance(raw, bytes):  # Binary preview frames
+                            continue
+                        self._dispatch_event(json.loads(raw))
+            except (OSError, websockets.WebSocketException, json.JSONDecodeError):
+                pass
+            finally:
+                self.events_connected = False
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def _dispatch_event(self, message: dict):
+        data = message.get("data") or {}
+        queue = self._watchers.get(data.get("prompt_id"))
+        if queue is not None:
+            queue.put_nowait(message)
+
+    async def watch_progress(self, prompt_id: str) -> AsyncGenerator[dict, None]:
+        """Yield progress updates for a prompt until it completes or fails.
+
+        Updates are driven by the websocket event stream. History is only
+        polled, with backoff, while no events arrive for the prompt.
+        """
+        self.start_events()
+        queue: asyncio.Queue = asyncio.Queue()
+        self._watchers[prompt_id] = queue
+        outputs: dict = {}
+        poll_interval = self.min_poll_interval
+
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    progress = await self.get_progress(prompt_id)
+                    if progress["status"] != "running":
+                        yield progress
+                        return
+                    poll_interval = min(poll_interval * 2, self.max_poll_interval)
+                    continue
+
+                poll_interval = self.min_poll_interval
+                event_type = message.get("type")
+                data = message.get("data") or {}
+
+                if event_type == "progress" and data.get("max"):
+                    yield {"status": "running", "progress": min(99, int(data["value"] * 100 / data["max"]))}
+                elif event_type == "executed":
+                    outputs[data["node"]] = data.get("output") or {}
+                elif event_type == "execution_error":
+                    yield {"status": "failed", "error": data.get("exception_message", "Generation failed in ComfyUI")}
+                    return
+                elif event_type == "execution_interrupted":
+                    yield {"status": "failed", "error": "Generation interrupted"}
+                    return
+                elif event_type in ("executing", "execution_success") and data.get("node") is None:
+                    # Cached nodes emit no "executed" event; let history fill in the outputs
+                    if outputs:
+                        yield {"status": "complete", "outputs": outputs}
+                        return
+        finally:
+            self._watchers.pop(prompt_id, None)
+
     async def close(self):
+        if self._events_task is not None:
+            self._events_task.cancel()
         await self._client.aclose()
 
 
-_comfyui_client: ComfyUIClient | None = None
+class ComfyUIUnavailableError(Exception):
+    """Raised when no ComfyUI backend is healthy."""
+
+
+class ComfyUIBackend:
+    def __init__(self, client: ComfyUIClient):
+        self.client = client
+        self.healthy = True
+        self.queue_depth = 0
+        self.active = 0
+        # Checkpoint of the last workflow we sent; ComfyUI keeps it loaded
+        self.loaded_checkpoint: str | None = None
+
+
+class ComfyUIPool:
+    """Routes workflows across several ComfyUI instances.
+
+    Prefers a healthy backend that already has the requested checkpoint
+    loaded, then the one with the shortest queue. Each backend runs at most
+    `max_concurrency` of our jobs at a time.
+    """
+
+    def __init__(
+        self,
+        base_urls: list[str] | None = None,
+        max_concurrency: int | None = None,
+        health_interval: float | None = None,
+    ):
+        base_urls = base_urls or settings.comfyui_urls
+        self.backends = [ComfyUIBackend(ComfyUIClient(url)) for url in base_urls]
+        self.max_concurrency = max_concurrency or settings.comfyui_max_concurrency
+        self.health_interval = health_interval or settings.comfyui_health_interval
+        self._available = asyncio.Condition()
+        self._health_task: asyncio.Task | None = None
+        self._refreshed = False
+
+    @property
+    def capacity(self) -> int:
+        return self.max_concurrency * len(self.backends)
+
+    async def refresh(self):
+        """Update health and queue depth of every backend."""
+        async def check(backend: ComfyUIBackend):
+            backend.healthy = await backend.client.check_health()
+            if backend.healthy:
+                try:
+                    backend.queue_depth = await backend.client.get_queue_depth()
+                except httpx.HTTPError:
+                    backend.healthy = False
+
+        await asyncio.gather(*(check(backend) for backend in self.backends))
+        self._refreshed = True
+        async with self._available:
+            self._available.notify_all()
+
+    def start_health_checks(self):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("ComfyUI health check failed")
+
+    def _select(self, checkpoint: str | None) -> ComfyUIBackend | None:
+        candidates = [
+            backend for backend in self.backends
+            if backend.healthy and backend.active < self.max_concurrency
+        ]
+        if not candidates:
+            return None
+        return min(
+            candidates,
+            key=lambda backend: (
+                checkpoint is not None and backend.loaded_checkpoint != checkpoint,
+                backend.queue_depth + backend.active,
+            ),
+        )
+
+    async def acquire(self, checkpoint: str | None = None) -> ComfyUIClient:
+        """Reserve a slot on the best backend for a workflow using `checkpoint`."""
+        if not self._refreshed:
+            await self.refresh()
+        self.start_health_checks()
+
+        async with self._available:
+            while True:
+                if not any(backend.healthy for backend in self.backends):
+                    raise ComfyUIUnavailableError("No healthy ComfyUI backend")
+                backend = self._select(checkpoint)
+                if backend is not None:
+                    break
+                await self._available.wait()
+
+            backend.active += 1
+            if checkpoint is not None:
+                backend.loaded_checkpoint = checkpoint
+            return backend.client
+
+    async def release(self, client: ComfyUIClient):
+        async with self._available:
+            for backend in self.backends:
+                if backend.client is client:
+                    backend.active -= 1
+            self._available.notify()
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for backend in self.backends:
+            await backend.client.close()
+
+
+_comfyui_pool: ComfyUIPool | None = None
+
+
+def get_comfyui_pool() -> ComfyUIPool:
+    global _comfyui_pool
+    if _comfyui_pool is None:
+        _comfyui_pool = ComfyUIPool()
+    return _comfyui_pool
 
 
-def get_comfyui_client() -> ComfyUIClient:
-    global _comfyui_client
-    if _comfyui_client is None:
-        _comfyui_client = ComfyUIClient()
-    return _comfyui_client
+async def close_comfyui_pool():
+    global _comfyui_pool
+    if _comfyui_pool is not None:
+        await _comfyui_pool.close()
+        _comfyui_pool = None
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+
+from app.config import settings
+
+try:
+    import asyncpg
+except ImportError:  # LISTEN/NOTIFY fan-out is optional
+    asyncpg = None
+
+TERMINAL_STATUSES = ("complete", "failed")
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel fed by the generations trigger (migration 00006)
+CHANNEL = "generation_events"
+
+
+class GenerationEventHub:
+    """In-process pub/sub for generation status, progress and outputs.
+
+    Status writes publish here and SSE endpoints subscribe per generation or
+    per conversation. With `generation_events_dsn` set, events come from
+    Postgres LISTEN/NOTIFY instead, so every worker sees every change. A lost
+    LISTEN connection is re-established with backoff; meanwhile this worker
+    falls back to its own events.
+    """
+
+    reconnect_delay = 1.0
+    max_reconnect_delay = 30.0
+
+    def __init__(self, queue_size: int | None = None):
+        self.queue_size = queue_size or settings.generation_events_queue_size
+        self.listening = False
+        self._conversations: dict[str, str] = {}
+        self._subscribers: dict[tuple[str, str], set[asyncio.Queue]] = {}
+        self._connection = None
+        self._reconnect_task: asyncio.Task | None = None
+        self._closed = False
+
+    def track(self, generation_id: str, conversation_id: str):
+        """Remember a generation's conversation so its events reach conversation streams."""
+        self._conversations[generation_id] = conversation_id
+
+    def publish(self, generation_id: str, fields: dict):
+        """Fan a change out to subscribers without blocking the writer."""
+        conversation_id = self._conversations.get(generation_id)
+        if fields.get("status") in TERMINAL_STATUSES:
+            self._conversations.pop(generation_id, None)
+        # NOTIFY delivers the same change to every worker, this one included
+        if self.listening:
+            return
+
+        event = {"id": generation_id, **fields}
+        if conversation_id is not None:
+            event["conversation_id"] = conversation_id
+        self._dispatch(event)
+
+    def _dispatch(self, event: dict):
+        topics = [("generation", str(event["id"]))]
+        if event.get("conversation_id"):
+            topics.append(("conversation", str(event["conversation_id"])))
+        for topic in topics:
+            for queue in self._subscribers.get(topic, ()):
+                # A slow client loses its oldest updates rather than holding up the writer
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(event)
+
+    def subscribe(self, generation_id: str | None = None, conversation_id: str | None = None) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        topic = ("generation", generation_id) if generation_id else ("conversation", conversation_id)
+        self._subscribers.setdefault(topic, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        for topic, queues in list(self._subscribers.items()):
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[topic]
+
+    async def start(self):
+        """Listen for NOTIFY events when a Postgres DSN is configured."""
+        if not settings.generation_events_dsn or self._connection is not None:
+            return
+        if asyncpg is None:
+            raise RuntimeError("GENERATION_EVENTS_DSN is set but asyncpg is not installed")
+        self._closed = False
+        await self._listen()
+
+    async def _listen(self):
+        connection = await asyncpg.connect(settings.generation_events_dsn)
+        connection.add_termination_listener(self._on_terminated)
+        await connection.add_listener(CHANNEL, self._on_notify)
+        self._connection = connection
+        self.listening = True
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        self._dispatch(json.loads(payload))
+
+    def _on_terminated(self, connection):
+        if connection is not self._connection:
+            return
+        # Fall back to this worker's own events while reconnecting
+        self.listening = False
+        self._connection = None
+        if self._closed:
+            return
+        logger.warning("Lost the generation events LISTEN connection; reconnecting")
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = self.reconnect_delay
+        while not self._closed:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+            except Exception:
+                logger.warning("Reconnecting the generation events listener failed", exc_info=True)
+                delay = min(delay * 2, self.max_reconnect_delay)
+            else:
+                logger.info("Generation events listener reconnected")
+                return
+
+    async def close(self):
+        self._closed = True
+        self.listening = False
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await connection.close()
+
+
+_generation_events: GenerationEventHub | None = None
+
+
+def get_generation_events() -> GenerationEventHub:
+    global _generation_events
+    if _generation_events is None:
+        _generation_events = GenerationEventHub()
+    return _generation_events
+
+
+async def close_generation_events():
+    global _generation_events
+    if _generation_events is not None:
+        await _generation_events.close()
+        _generation_events = None
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.services.generation_events import TERMINAL_STATUSES, get_generation_events
+from app.services.supabase import get_async_supabase_client
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationStatusWriter:
+    """Coalesces generation status writes.
+
+    Status transitions are written immediately, no-op updates are dropped and
+    progress updates are rate limited per generation, then flushed for all
+    generations in a single batched call.
+    """
+
+    def __init__(
+        self,
+        min_delta: int | None = None,
+        max_interval: float | None = None,
+        flush_interval: float | None = None,
+    ):
+        self.min_delta = min_delta if min_delta is not None else settings.generation_progress_min_delta
+        self.max_interval = max_interval if max_interval is not None else settings.generation_progress_interval
+        self.flush_interval = flush_interval if flush_interval is not None else settings.generation_status_flush_interval
+        self._written: dict[str, dict] = {}
+        self._written_at: dict[str, float] = {}
+        self._pending_progress: dict[str, int] = {}
+        self._flush_task: asyncio.Task | None = None
+
+    async def write(self, generation_id: str, fields: dict):
+        """Write a status change now, dropping it if nothing changed."""
+        written = self._written.get(generation_id, {})
+        if all(written.get(key) == value for key, value in fields.items()):
+            return
+
+        # A direct write supersedes any progress still waiting for a flush
+        self._pending_progress.pop(generation_id, None)
+
+        db = await get_async_supabase_client()
+        await db.table("generations").update(fields).eq("id", generation_id).execute()
+        get_generation_events().publish(
+            generation_id,
+            {key: value for key, value in fields.items() if key != "parameters"},
+        )
+
+        if fields.get("status") in TERMINAL_STATUSES:
+            self._forget(generation_id)
+        else:
+            self._written[generation_id] = {**written, **fields}
+            self._written_at[generation_id] = time.monotonic()
+
+    def update_progress(self, generation_id: str, progress: int):
+        """Record progress to be written on a later flush."""
+        if self._written.get(generation_id, {}).get("progress") == progress:
+            self._pending_progress.pop(generation_id, None)
+            return
+        # Subscribers see every step; only the database write is rate limited
+        if self._pending_progress.get(generation_id) != progress:
+            get_generation_events().publish(generation_id, {"progress": progress})
+        self._pending_progress[generation_id] = progress
+        self._start_flusher()
+
+    async def flush(self, force: bool = False):
+        """Write pending progress that is due (or all of it when forced) in one call."""
+        now = time.monotonic()
+        due = {}
+        for generation_id, progress in self._pending_progress.items():
+            last_progress = self._written.get(generation_id, {}).get("progress", 0)
+            last_written_at = self._written_at.get(generation_id, 0.0)
+            if (
+                force
+                or abs(progress - last_progress) >= self.min_delta
+                or now - last_written_at >= self.max_interval
+            ):
+                due[generation_id] = progress
+
+        if not due:
+            return
+
+        db = await get_async_supabase_client()
+        await db.rpc("update_generation_progress", {
+            "updates": [{"id": generation_id, "progress": progress} for generation_id, progress in due.items()],
+        }).execute()
+
+        for generation_id, progress in due.items():
+            # Keep anything that arrived while the batch was in flight
+            if self._pending_progress.get(generation_id) == progress:
+                del self._pending_progress[generation_id]
+            self._written.setdefault(generation_id, {})["progress"] = progress
+            self._written_at[generation_id] = now
+
+    def _forget(self, generation_id: str):
+        self._written.pop(generation_id, None)
+        self._written_at.pop(generation_id, None)
+        self._pending_progress.pop(generation_id, None)
+
+    def _start_flusher(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while self._pending_progress:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                # Progress is best effort; failed entries stay pending for the next flush
+                logger.warning("Generation progress flush failed", exc_info=True)
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        if self._pending_progress:
+            await self.flush(force=True)
+
+
+_status_writer: GenerationStatusWriter | None = None
+
+
+def get_status_writer() -> GenerationStatusWriter:
+    global _status_writer
+    if _status_writer is None:
+        _status_writer = GenerationStatusWriter()
+    return _status_writer
+
+
+async def close_status_writer():
+    global _status_writer
+    if _status_writer is not None:
+        await _status_writer.close()
+        _status_writer = None
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+
+from app.config import settings
+from app.services.supabase import get_async_supabase_client
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("await", "fire_and_forget")
+
+
+class MessageWriter:
+    """Write-behind queue that persists chat messages in bulk inserts.
+
+    Rows from all conversations share one FIFO queue that is flushed when it
+    reaches `batch_size` or every `flush_interval` seconds. Each row gets a
+    client-side created_at that is strictly increasing, so rows inserted in
+    the same statement still sort in the order they were written.
+
+    With "await" durability, write() returns once the row's batch is stored;
+    with "fire_and_forget" it returns immediately and failed batches are
+    retried up to `max_attempts` times, backing off exponentially from
+    `retry_backoff` seconds. Rows that run out of attempts are logged.
+    """
+
+    max_retry_backoff = 10.0
+
+    def __init__(
+        self,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        durability: str | None = None,
+        max_attempts: int = 5,
+        retry_backoff: float = 0.5,
+    ):
+        self.batch_size = batch_size or settings.message_write_batch_size
+        self.flush_interval = flush_interval if flush_interval is not None else settings.message_write_flush_interval
+        self.durability = durability or settings.message_write_durability
+        if self.durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {self.durability}")
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._closing = False
+        self._pending: list[tuple[dict, asyncio.Future | None, int]] = []
+        self._last_created_at = datetime.min.replace(tzinfo=timezone.utc)
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    def _next_created_at(self) -> str:
+        created_at = max(datetime.now(timezone.utc), self._last_created_at + timedelta(microseconds=1))
+        self._last_created_at = created_at
+        return created_at.isoformat()
+
+    async def write(self, row: dict, wait: bool | None = None):
+        """Queue a message row, waiting for it to be stored under "await" durability."""
+        if wait is None:
+            wait = self.durability == "await"
+
+        future = asyncio.get_running_loop().create_future() if wait else None
+        self._pending.append(({**row, "created_at": self._next_created_at()}, future, 0))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        self._start_flusher()
+
+        if future is not None:
+            await future
+
+    async def flush(self):
+        """Insert everything queued so far, batch by batch in queue order."""
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:len(batch)]
+                try:
+                    db = await get_async_supabase_client()
+                    await db.table("messages").insert([row for row, _, _ in batch]).execute()
+                except Exception as e:
+                    retry = []
+                    for row, future, attempts in batch:
+                        if future is not None:
+                            future.set_exception(e)
+                        elif attempts + 1 < self.max_attempts:
+                            retry.append((row, None, attempts + 1))
+                        else:
+                            logger.error(
+                                "Dropping %s message of conversation %s after %d attempts: %s",
+                                row.get("role"), row.get("conversation_id"), attempts + 1, e,
+                            )
+                    # Retried rows go back to the front to keep their order
+                    self._pending[:0] = retry
+                    raise
+                except BaseException:
+                    # Cancelled mid-insert: the rows may not be stored, so keep them queued
+                    self._pending[:0] = batch
+                    raise
+                for _, future, _ in batch:
+                    if future is not None and not future.done():
+                        future.set_result(None)
+
+    def _start_flusher(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        failures = 0
+        while self._pending:
+            if not self._closing:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                failures = 0
+            except Exception:
+                failures += 1
+                logger.warning("Message flush failed (%d in a row)", failures, exc_info=True)
+                if self._pending:
+                    await asyncio.sleep(min(self.retry_backoff * 2 ** (failures - 1), self.max_retry_backoff))
+
+    async def close(self):
+        """Drain the queue, letting an in-flight insert finish rather than cancelling it."""
+        self._closing = True
+        self._wakeup.set()
+        if self._flush_task is not None:
+            await self._flush_task
+        if self._pending:
+            await self.flush()
+
+
+_message_writer: MessageWriter | None = None
+
+
+def get_message_writer() -> MessageWriter:
+    global _message_writer
+    if _message_writer is None:
+        _message_writer = MessageWriter()
+    return _message_writer
+
+
+async def close_message_writer():
+    global _message_writer
+    if _message_writer is not None:
+        await _message_writer.close()
+        _message_writer = None
@@ -1,15 +1,25 @@
+import asyncio
 import json
+import time
 from typing import AsyncGenerator
 
 import httpx
 
 from app.config import settings
+from app.core.metrics import OLLAMA_ERRORS, OLLAMA_TOKENS_PER_SECOND, OLLAMA_TTFT, span
+
+
+class OllamaError(Exception):
+    """Raised when Ollama reports an error in its response stream."""
 
 
 class OllamaClient:
     def __init__(self, base_url: str | None = None):
         self.base_url = base_url or settings.ollama_base_url
-        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=120.0)
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(settings.ollama_timeout, connect=settings.ollama_connect_timeout),
+        )
 
     async def generate(
         self,
@@ -17,22 +27,67 @@ class OllamaClient:
         prompt: str,
         system: str | None = None,
         context: list | None = None,
+        options: dict | None = None,
+        format: dict | str | None = None,
     ) -> AsyncGenerator[dict, None]:
-        """Stream generate response from Ollama."""
+        """Stream generate response from Ollama, optionally constrained to a JSON schema."""
         payload = {
             "model": model,
             "prompt": prompt,
             "stream": True,
+            "keep_alive": settings.ollama_keep_alive,
         }
         if system:
             payload["system"] = system
         if context:
             payload["context"] = context
+        if options:
+            payload["options"] = options
+        if format:
+            payload["format"] = format
+
+        started = time.perf_counter()
+        first_token_at = None
+        tokens = 0
+        with span("ollama.generate", model=model, host=self.base_url):
+            try:
+                async with self._client.stream("POST", "/api/generate", json=payload) as response:
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        if "error" in data:
+                            raise OllamaError(data["error"])
+                        if data.get("response"):
+                            tokens += 1
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                                OLLAMA_TTFT.observe(first_token_at - started, model=model)
+                        if data.get("done"):
+                            self._observe_speed(model, data, tokens, first_token_at)
+                        yield data
+            except (httpx.HTTPError, OllamaError):
+                OLLAMA_ERRORS.inc(model=model)
+                raise
 
-        async with self._client.stream("POST", "/api/generate", json=payload) as response:
-            async for line in response.aiter_lines():
-                if line:
-                    yield json.loads(line)
+    @staticmethod
+    def _observe_speed(model: str, done: dict, tokens: int, first_token_at: float | None):
+        # Prefer Ollama's own eval timings; fall back to streamed chunks over wall time
+        if done.get("eval_count") and done.get("eval_duration"):
+            OLLAMA_TOKENS_PER_SECOND.observe(done["eval_count"] / (done["eval_duration"] / 1e9), model=model)
+        elif first_token_at is not None and tokens > 1:
+            elapsed = time.perf_counter() - first_token_at
+            if elapsed > 0:
+                OLLAMA_TOKENS_PER_SECOND.observe((tokens - 1) / elapsed, model=model)
+
+    async def prewarm(self, model: str):
+        """Load a model into memory without generating anything."""
+        response = await self._client.post("/api/generate", json={
+            "model": model,
+            "prompt": "",
+            "keep_alive": settings.ollama_keep_alive,
+        })
+        response.raise_for_status()
 
     async def list_models(self) -> list[dict]:
         """List available models."""
@@ -52,12 +107,183 @@ class OllamaClient:
         await self._client.aclose()
 
 
+class CircuitBreaker:
+    """Ejects a host after consecutive failures and lets a single probe through later."""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        # A probe request is in flight to the half-open host
+        self.probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """True if closed, or open long enough that a probe request may try it and none is in flight."""
+        if self.opened_at is None:
+            return True
+        return not self.probing and time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            # A failed probe re-opens the breaker for another full timeout
+            self.opened_at = time.monotonic()
+
+
+class OllamaHost:
+    def __init__(self, client: OllamaClient):
+        self.client = client
+        self.models: set[str] = set()
+        self.active = 0
+        self.last_model: str | None = None
+        self.breaker = CircuitBreaker(settings.ollama_failure_threshold, settings.ollama_reset_timeout)
+
+    def has_model(self, model: str) -> bool:
+        return model in self.models or f"{model}:latest" in self.models
+
+
+class OllamaPool:
+    """Spreads Ollama requests over several hosts.
+
+    Requests go to the least-loaded host whose /api/tags inventory has the
+    model (any available host if none lists it). Hosts that keep failing are
+    ejected by their circuit breaker, and a request that fails before its
+    first token is retried on another host. Exposes the same interface as
+    OllamaClient.
+    """
+
+    def __init__(self, base_urls: list[str] | None = None, inventory_interval: float | None = None):
+        base_urls = base_urls or settings.ollama_urls
+        self.hosts = [OllamaHost(OllamaClient(url)) for url in base_urls]
+        self.inventory_interval = inventory_interval or settings.ollama_inventory_interval
+        self._inventory_task: asyncio.Task | None = None
+        self._refreshed = False
+
+    async def refresh(self):
+        """Update each host's model inventory; this also probes ejected hosts."""
+        async def check(host: OllamaHost):
+            try:
+                models = await host.client.list_models()
+            except httpx.HTTPError:
+                host.breaker.record_failure()
+                return
+            host.models = {model["name"] for model in models}
+            host.breaker.record_success()
+
+        await asyncio.gather(*(check(host) for host in self.hosts))
+        self._refreshed = True
+
+    def start_inventory_checks(self):
+        if self._inventory_task is None or self._inventory_task.done():
+            self._inventory_task = asyncio.create_task(self._inventory_loop())
+
+    async def _inventory_loop(self):
+        while True:
+            await asyncio.sleep(self.inventory_interval)
+            await self.refresh()
+
+    def _select(self, model: str, exclude: set[int], listed_only: bool = False) -> OllamaHost | None:
+        available = [
+            host for i, host in enumerate(self.hosts)
+            if i not in exclude and host.breaker.allow()
+        ]
+        candidates = [host for host in available if host.has_model(model)]
+        if not candidates and not listed_only:
+            candidates = available
+        if not candidates:
+            return None
+        # Least loaded first; on a tie prefer a host that last served this model
+        return min(candidates, key=lambda host: (host.active, host.last_model != model))
+
+    async def generate(self, model: str, prompt: str, **kwargs) -> AsyncGenerator[dict, None]:
+        """Stream from the best host, retrying on another host before the first token."""
+        if not self._refreshed:
+            await self.refresh()
+        self.start_inventory_checks()
+
+        tried: set[int] = set()
+        last_error: Exception | None = None
+        while True:
+            # After a model error only hosts listing the model could answer differently
+            host = self._select(model, tried, listed_only=isinstance(last_error, OllamaError))
+            if host is None:
+                if last_error is not None:
+                    raise last_error
+                raise OllamaError(f"No available Ollama host for model {model}")
+            tried.add(self.hosts.index(host))
+
+            started = False
+            probe = host.breaker.is_open
+            host.breaker.probing = probe
+            host.active += 1
+            host.last_model = model
+            try:
+                async for chunk in host.client.generate(model=model, prompt=prompt, **kwargs):
+                    started = True
+                    yield chunk
+                host.breaker.record_success()
+                return
+            except (httpx.TransportError, OllamaError) as e:
+                # Only transport problems count against the host itself
+                if isinstance(e, httpx.TransportError):
+                    host.breaker.record_failure()
+                if started:
+                    raise
+                last_error = e
+            finally:
+                host.active -= 1
+                if probe:
+                    host.breaker.probing = False
+
+    async def prewarm(self, model: str):
+        host = self._select(model, set())
+        if host is not None:
+            host.last_model = model
+            await host.client.prewarm(model)
+
+    async def list_models(self) -> list[dict]:
+        """List models available on any host."""
+        if not self._refreshed:
+            await self.refresh()
+        names = sorted({name for host in self.hosts if not host.breaker.is_open for name in host.models})
+        return [{"name": name} for name in names]
+
+    async def check_health(self) -> bool:
+        results = await asyncio.gather(*(host.client.check_health() for host in self.hosts))
+        return any(results)
+
+    async def close(self):
+        if self._inventory_task is not None:
+            self._inventory_task.cancel()
+        for host in self.hosts:
+            await host.client.close()
+
+
 # Singleton instance
-_ollama_client: OllamaClient | None = None
+_ollama_client: OllamaPool | None = None
 
 
-def get_ollama_client() -> OllamaClient:
+def get_ollama_client() -> OllamaPool:
+    """Get the shared pool of Ollama hosts (a drop-in for a single client)."""
     global _ollama_client
     if _ollama_client is None:
-        _ollama_client = OllamaClient()
+        _ollama_client = OllamaPool()
     return _ollama_client
+
+
+async def close_ollama_client():
+    global _ollama_client
+    if _ollama_client is not None:
+        await _ollama_client.close()
+        _ollama_client = None
@@ -0,0 +1,58 @@
+from typing import AsyncIterable
+
+import httpx
+
+from app.config import settings
+
+
+class StorageClient:
+    """Minimal Supabase Storage client that uploads request bodies as streams."""
+
+    def __init__(self, base_url: str | None = None, key: str | None = None, bucket: str | None = None):
+        self.base_url = (base_url or settings.supabase_url).rstrip("/") + "/storage/v1"
+        self.bucket = bucket or settings.storage_bucket
+        key = key or settings.supabase_key
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+            timeout=httpx.Timeout(settings.supabase_timeout, write=None),
+        )
+
+    async def exists(self, path: str) -> bool:
+        response = await self._client.head(f"/object/{self.bucket}/{path}")
+        return response.status_code == 200
+
+    async def upload(self, path: str, content: AsyncIterable[bytes], content_type: str, size: int):
+        """Upload an object from an async byte stream without buffering it."""
+        response = await self._client.post(
+            f"/object/{self.bucket}/{path}",
+            content=content,
+            headers={"Content-Type": content_type, "Content-Length": str(size), "x-upsert": "false"},
+        )
+        # Content-addressed keys: an existing object already holds identical bytes
+        if response.status_code in (400, 409) and "Duplicate" in response.text:
+            return
+        response.raise_for_status()
+
+    def public_url(self, path: str) -> str:
+        return f"{self.base_url}/object/public/{self.bucket}/{path}"
+
+    async def close(self):
+        await self._client.aclose()
+
+
+_storage_client: StorageClient | None = None
+
+
+def get_storage_client() -> StorageClient:
+    global _storage_client
+    if _storage_client is None:
+        _storage_client = StorageClient()
+    return _storage_client
+
+
+async def close_storage_client():
+    global _storage_client
+    if _storage_client is not None:
+        await _storage_client.close()
+        _storage_client = None
@@ -1,8 +1,37 @@
-from supabase import create_client, Client
+import asyncio
+import time
+
+import httpx
+from supabase import create_client, Client, acreate_client, AsyncClient, AsyncClientOptions
 
 from app.config import settings
+from app.core.metrics import SUPABASE_REQUEST
 
 _client: Client | None = None
+_async_client: AsyncClient | None = None
+_async_client_lock = asyncio.Lock()
+
+
+# PostgREST verbs by HTTP method
+_OPERATIONS = {"GET": "select", "HEAD": "select", "POST": "insert", "PATCH": "update", "PUT": "upsert", "DELETE": "delete"}
+
+
+async def _start_timer(request: httpx.Request):
+    request.extensions["started"] = time.perf_counter()
+
+
+async def _record_latency(response: httpx.Response):
+    request = response.request
+    started = request.extensions.get("started")
+    if started is None:
+        return
+    # /rest/v1/<table> or /rest/v1/rpc/<function>
+    parts = request.url.path.split("/rest/v1/", 1)[-1].split("/")
+    if parts[0] == "rpc" and len(parts) > 1:
+        table, op = parts[1], "rpc"
+    else:
+        table, op = parts[0], _OPERATIONS.get(request.method, request.method.lower())
+    SUPABASE_REQUEST.observe(time.perf_counter() - started, table=table, op=op)
 
 
 def get_supabase_client() -> Client:
@@ -10,3 +39,32 @@ def get_supabase_client() -> Client:
     if _client is None:
         _client = create_client(settings.supabase_url, settings.supabase_key)
     return _client
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    """Get the shared async client backed by a pooled httpx connection pool."""
+    global _async_client
+    if _async_client is None:
+        async with _async_client_lock:
+            if _async_client is None:
+                http_client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(settings.supabase_timeout),
+                    limits=httpx.Limits(
+                        max_connections=settings.supabase_pool_size,
+                        max_keepalive_connections=settings.supabase_pool_size,
+                    ),
+                    event_hooks={"request": [_start_timer], "response": [_record_latency]},
+                )
+                _async_client = await acreate_client(
+                    settings.supabase_url,
+                    settings.supabase_key,
+                    options=AsyncClientOptions(httpx_client=http_client),
+                )
+    return _async_client
+
+
+async def close_async_supabase_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.options.httpx_client.aclose()
+        _async_client = None
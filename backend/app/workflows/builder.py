@@ -1,3 +1,4 @@
+import hashlib
 import json
 import random
 from pathlib import Path
@@ -5,12 +6,105 @@ from pathlib import Path
 
 TEMPLATES_DIR = Path(__file__).parent / "templates"
 
+# Parameter slots resolved by node class_type and input name. A third element
+# follows that input's link and patches the named input on the linked node.
+SLOT_SPECS: dict[str, tuple[str, ...]] = {
+    "seed": ("KSampler", "seed"),
+    "steps": ("KSampler", "steps"),
+    "cfg": ("KSampler", "cfg"),
+    "sampler": ("KSampler", "sampler_name"),
+    "checkpoint": ("CheckpointLoaderSimple", "ckpt_name"),
+    "width": ("EmptyLatentImage", "width"),
+    "height": ("EmptyLatentImage", "height"),
+    "batch_size": ("EmptyLatentImage", "batch_size"),
+    "prompt": ("KSampler", "positive", "text"),
+    "negative_prompt": ("KSampler", "negative", "text"),
+}
+
+
+class TemplateError(ValueError):
+    """Raised when a workflow template is malformed."""
+
+
+class WorkflowTemplate:
+    def __init__(self, name: str, workflow: dict):
+        self.name = name
+        self.workflow = workflow
+        validate_workflow(name, workflow)
+        self.slots = resolve_slots(workflow)
+
+    def render(self, **params) -> dict:
+        """Copy the template structure and patch parameter slots."""
+        unknown = set(params) - set(self.slots)
+        if unknown:
+            raise TemplateError(f"Template {self.name} has no slots for: {', '.join(sorted(unknown))}")
+
+        # Only the inputs dicts are ever patched, so links and other values can be shared
+        workflow = {
+            node_id: {**node, "inputs": dict(node["inputs"])}
+            for node_id, node in self.workflow.items()
+        }
+        for param, value in params.items():
+            for node_id, input_name in self.slots[param]:
+                workflow[node_id]["inputs"][input_name] = value
+        return workflow
+
+
+def validate_workflow(name: str, workflow: dict):
+    """Check every node has a class_type and inputs, and every link points at a node."""
+    for node_id, node in workflow.items():
+        if "class_type" not in node or not isinstance(node.get("inputs"), dict):
+            raise TemplateError(f"Template {name}: node {node_id} needs class_type and inputs")
+        for input_name, value in node["inputs"].items():
+            if isinstance(value, list) and value and value[0] not in workflow:
+                raise TemplateError(f"Template {name}: {node_id}.{input_name} links to missing node {value[0]}")
+
+
+def resolve_slots(workflow: dict) -> dict[str, list[tuple[str, str]]]:
+    """Map each parameter to the (node_id, input_name) pairs it patches."""
+    slots: dict[str, list[tuple[str, str]]] = {}
+    for param, spec in SLOT_SPECS.items():
+        class_type, input_name = spec[0], spec[1]
+        for node_id, node in workflow.items():
+            if node["class_type"] != class_type or input_name not in node["inputs"]:
+                continue
+            if len(spec) == 2:
+                slots.setdefault(param, []).append((node_id, input_name))
+            else:
+                linked_id = node["inputs"][input_name][0]
+                if spec[2] in workflow[linked_id]["inputs"]:
+                    slots.setdefault(param, []).append((linked_id, spec[2]))
+    return slots
+
+
+class TemplateRegistry:
+    """Loads, validates and resolves all workflow templates once."""
+
+    def __init__(self, templates_dir: Path = TEMPLATES_DIR):
+        self.templates: dict[str, WorkflowTemplate] = {}
+        for template_path in sorted(templates_dir.glob("*.json")):
+            with open(template_path) as f:
+                self.templates[template_path.stem] = WorkflowTemplate(template_path.stem, json.load(f))
+
+    def get(self, name: str) -> WorkflowTemplate:
+        if name not in self.templates:
+            raise TemplateError(f"Unknown workflow template: {name}")
+        return self.templates[name]
+
+
+_registry: TemplateRegistry | None = None
+
+
+def get_template_registry() -> TemplateRegistry:
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry()
+    return _registry
+
 
 def load_template(name: str) -> dict:
-    """Load a workflow template by name."""
-    template_path = TEMPLATES_DIR / f"{name}.json"
-    with open(template_path) as f:
-        return json.load(f)
+    """Get a copy of a workflow template by name."""
+    return get_template_registry().get(name).render()
 
 
 def build_txt2img_workflow(
@@ -23,32 +117,43 @@ def build_txt2img_workflow(
     seed: int | None = None,
     checkpoint: str = "sd_xl_base_1.0.safetensors",
     sampler: str = "euler",
+    batch_size: int = 1,
 ) -> dict:
-    """Build a txt2img workflow from parameters."""
-    workflow = load_template("basic_txt2img")
+    """Build a txt2img workflow from parameters.
 
+    With `batch_size` > 1 ComfyUI samples that many latents in one pass;
+    image i of the batch is reproduced by the same seed at batch index i.
+    """
     # Set seed (random if not provided)
     if seed is None:
         seed = random.randint(0, 2**32 - 1)
 
-    # Update KSampler
-    workflow["3"]["inputs"]["seed"] = seed
-    workflow["3"]["inputs"]["steps"] = steps
-    workflow["3"]["inputs"]["cfg"] = cfg
-    workflow["3"]["inputs"]["sampler_name"] = sampler
-
-    # Update checkpoint
-    workflow["4"]["inputs"]["ckpt_name"] = checkpoint
-
-    # Update latent size
-    workflow["5"]["inputs"]["width"] = width
-    workflow["5"]["inputs"]["height"] = height
-
-    # Update prompts
-    workflow["6"]["inputs"]["text"] = prompt
-    workflow["7"]["inputs"]["text"] = negative_prompt
-
-    return workflow
+    return get_template_registry().get("basic_txt2img").render(
+        seed=seed,
+        steps=steps,
+        cfg=cfg,
+        sampler=sampler,
+        checkpoint=checkpoint,
+        width=width,
+        height=height,
+        batch_size=batch_size,
+        prompt=prompt,
+        negative_prompt=negative_prompt,
+    )
+
+
+def workflow_hash(workflow: dict) -> str:
+    """Canonical hash of a workflow: identical graphs hash equally regardless of key order."""
+    canonical = json.dumps(workflow, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def get_workflow_checkpoint(workflow: dict) -> str | None:
+    """Return the checkpoint a workflow loads, if any."""
+    for node in workflow.values():
+        if node.get("class_type") == "CheckpointLoaderSimple":
+            return node["inputs"].get("ckpt_name")
+    return None
 
 
 def parse_technical_parameters(technical_response: str) -> dict:
@@ -0,0 +1,290 @@
+"""In-process fake Ollama, ComfyUI and Supabase servers for benchmarking.
+
+Each fake is a small FastAPI app with tunable latencies. They implement only
+the parts of the real APIs the backend uses.
+"""
+import asyncio
+import json
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class OllamaConfig:
+    models: tuple[str, ...] = ("llama3.2:latest",)
+    tokens_per_second: float = 50.0
+    response_tokens: int = 40
+    # Time to first token once the model is loaded
+    ttft: float = 0.05
+    # Extra delay when a request needs a different model than the loaded one
+    swap_delay: float = 0.5
+    # Requests served concurrently (OLLAMA_NUM_PARALLEL)
+    parallel: int = 4
+
+
+def fake_ollama_app(config: OllamaConfig) -> FastAPI:
+    app = FastAPI()
+    slots = asyncio.Semaphore(config.parallel)
+    state = {"loaded": None, "swaps": 0}
+    app.state.stats = state
+
+    async def load(model: str):
+        if state["loaded"] != model:
+            await asyncio.sleep(config.swap_delay)
+            state["loaded"] = model
+            state["swaps"] += 1
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": name} for name in config.models]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        payload = await request.json()
+        model = payload["model"]
+
+        # Prewarm: load the model, generate nothing
+        if not payload.get("prompt"):
+            async with slots:
+                await load(model)
+            return {"model": model, "response": "", "done": True}
+
+        if payload.get("format"):
+            tokens = [json.dumps({
+                "prompt": "benchmark scene",
+                "width": 1024,
+                "height": 1024,
+                "steps": 20,
+                "cfg": 7.0,
+                "sampler": "euler",
+                "notes": "Balanced defaults.",
+            })]
+        else:
+            tokens = ["lorem " for _ in range(config.response_tokens)]
+
+        async def stream():
+            async with slots:
+                await load(model)
+                await asyncio.sleep(config.ttft)
+                for token in tokens:
+                    yield json.dumps({"model": model, "response": token, "done": False}) + "\n"
+                    await asyncio.sleep(1 / config.tokens_per_second)
+                yield json.dumps({"model": model, "response": "", "done": True, "context": [1, 2, 3]}) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+
+@dataclass
+class ComfyUIConfig:
+    # Sampling time per step for a whole batch
+    step_delay: float = 0.01
+    # Prompts executed at once; real ComfyUI runs one
+    workers: int = 1
+
+
+def fake_comfyui_app(config: ComfyUIConfig) -> FastAPI:
+    queue: asyncio.Queue = asyncio.Queue()
+    pending: list[str] = []
+    running: list[str] = []
+    history: dict[str, dict] = {}
+    sockets: dict[str, WebSocket] = {}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        workers = [asyncio.create_task(worker()) for _ in range(config.workers)]
+        yield
+        for task in workers:
+            task.cancel()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.stats = Counter()
+
+    async def send(client_id: str, message: dict):
+        ws = sockets.get(client_id)
+        if ws is not None:
+            try:
+                await ws.send_text(json.dumps(message))
+            except Exception:
+                sockets.pop(client_id, None)
+
+    async def execute(prompt_id: str, workflow: dict, client_id: str):
+        steps, batch_size = 20, 1
+        for node in workflow.values():
+            if node.get("class_type") == "KSampler":
+                steps = node["inputs"].get("steps", steps)
+            if node.get("class_type") == "EmptyLatentImage":
+                batch_size = node["inputs"].get("batch_size", batch_size)
+
+        await send(client_id, {"type": "execution_start", "data": {"prompt_id": prompt_id}})
+        for step in range(1, steps + 1):
+            await asyncio.sleep(config.step_delay)
+            await send(client_id, {"type": "progress", "data": {"prompt_id": prompt_id, "value": step, "max": steps}})
+
+        output = {"images": [
+            {"filename": f"{prompt_id}_{index}.png", "subfolder": "", "type": "output"}
+            for index in range(batch_size)
+        ]}
+        history[prompt_id] = {"outputs": {"9": output}, "status": {"status_str": "success", "completed": True}}
+        await send(client_id, {"type": "executed", "data": {"prompt_id": prompt_id, "node": "9", "output": output}})
+        await send(client_id, {"type": "executing", "data": {"prompt_id": prompt_id, "node": None}})
+        app.state.stats["images"] += batch_size
+
+    async def worker():
+        while True:
+            prompt_id, workflow, client_id = await queue.get()
+            pending.remove(prompt_id)
+            running.append(prompt_id)
+            try:
+                await execute(prompt_id, workflow, client_id)
+            finally:
+                running.remove(prompt_id)
+
+    @app.post("/prompt")
+    async def queue_prompt(request: Request):
+        payload = await request.json()
+        prompt_id = uuid.uuid4().hex
+        pending.append(prompt_id)
+        app.state.stats["prompts"] += 1
+        await queue.put((prompt_id, payload["prompt"], payload.get("client_id", "")))
+        return {"prompt_id": prompt_id, "number": len(pending)}
+
+    @app.get("/history/{prompt_id}")
+    async def get_history(prompt_id: str):
+        return {prompt_id: history[prompt_id]} if prompt_id in history else {}
+
+    @app.get("/queue")
+    async def get_queue():
+        return {"queue_running": [[0, pid] for pid in running], "queue_pending": [[0, pid] for pid in pending]}
+
+    @app.get("/system_stats")
+    async def system_stats():
+        return {"system": {}, "devices": []}
+
+    @app.get("/view")
+    async def view(filename: str):
+        # Distinct bytes per file so content-addressed keys do not collide
+        return Response(b"\x89PNG" + filename.encode() * 64, media_type="image/png")
+
+    @app.websocket("/ws")
+    async def events(ws: WebSocket, clientId: str = ""):
+        await ws.accept()
+        sockets[clientId] = ws
+        try:
+            while True:
+                await ws.receive_text()
+        except WebSocketDisconnect:
+            sockets.pop(clientId, None)
+
+    return app
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _matches(row: dict, filters: list[tuple[str, str]]) -> bool:
+    for column, condition in filters:
+        op, _, value = condition.partition(".")
+        current = row.get(column)
+        if op == "eq" and str(current) != value:
+            return False
+        if op == "in" and str(current) not in value.strip("()").split(","):
+            return False
+    return True
+
+
+def fake_supabase_app() -> FastAPI:
+    """A PostgREST + Storage subset backed by in-memory tables.
+
+    Every REST/RPC request is counted in `app.state.calls`, keyed by method
+    and table, so benchmarks can report database round trips. Storage
+    requests are counted separately in `app.state.storage_calls`.
+    """
+    app = FastAPI()
+    tables: dict[str, list[dict]] = {}
+    objects: dict[str, bytes] = {}
+    app.state.calls = Counter()
+    app.state.storage_calls = Counter()
+    app.state.tables = tables
+
+    def query(request: Request) -> tuple[list[tuple[str, str]], str | None, str]:
+        filters, order, columns = [], None, "*"
+        for key, value in request.query_params.multi_items():
+            if key == "select":
+                columns = value
+            elif key == "order":
+                order = value
+            elif key not in ("limit", "offset"):
+                filters.append((key, value))
+        return filters, order, columns
+
+    def project(rows: list[dict], columns: str) -> list[dict]:
+        if columns.strip() == "*":
+            return rows
+        names = [name.strip() for name in columns.split(",")]
+        return [{name: row.get(name) for name in names} for row in rows]
+
+    @app.api_route("/rest/v1/rpc/{function}", methods=["POST"])
+    async def rpc(function: str, request: Request):
+        app.state.calls[f"rpc {function}"] += 1
+        payload = await request.json()
+        if function == "update_generation_progress":
+            for update in payload["updates"]:
+                for row in tables.get("generations", []):
+                    if row["id"] == update["id"] and row["status"] in ("queued", "running"):
+                        row["progress"] = update["progress"]
+        return JSONResponse(None)
+
+    @app.api_route("/rest/v1/{table}", methods=["GET", "POST", "PATCH"])
+    async def rest(table: str, request: Request):
+        app.state.calls[f"{request.method} {table}"] += 1
+        rows = tables.setdefault(table, [])
+        filters, order, columns = query(request)
+
+        if request.method == "POST":
+            payload = await request.json()
+            inserted = []
+            for item in payload if isinstance(payload, list) else [payload]:
+                row = {"id": str(uuid.uuid4()), "created_at": _now(), **item}
+                if table == "generations":
+                    row = {"outputs": [], "error": None, "parameters": {}, **row}
+                if table == "sessions":
+                    row = {"model_assignments": {}, "settings": {}, **row}
+                if table == "conversations":
+                    row = {"orchestrator_state": None, "updated_at": row["created_at"], **row}
+                rows.append(row)
+                inserted.append(row)
+            return project(inserted, columns)
+
+        matched = [row for row in rows if _matches(row, filters)]
+        if request.method == "PATCH":
+            payload = await request.json()
+            for row in matched:
+                row.update(payload)
+            return project(matched, columns)
+
+        if order:
+            column, _, direction = order.partition(".")
+            matched.sort(key=lambda row: row.get(column) or "", reverse=direction.startswith("desc"))
+        return project(matched, columns)
+
+    @app.api_route("/storage/v1/object/{bucket}/{path:path}", methods=["HEAD", "POST"])
+    async def storage(bucket: str, path: str, request: Request):
+        app.state.storage_calls[request.method] += 1
+        key = f"{bucket}/{path}"
+        if request.method == "HEAD":
+            return Response(status_code=200 if key in objects else 400)
+        if key in objects:
+            return JSONResponse({"error": "Duplicate"}, status_code=409)
+        objects[key] = await request.body()
+        return {"Key": key}
+
+    return app
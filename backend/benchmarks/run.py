@@ -0,0 +1,213 @@
+"""Drive the backend against in-process fake Ollama, ComfyUI and Supabase.
+
+    uv run python -m benchmarks.run --conversations 20 --rounds 3 --generations 20
+
+Runs N concurrent conversations through the chat SSE endpoint and a set of
+generations through the generations API, then reports TTFT, round latency,
+events/s and database round trips. Use `--json` to diff results across runs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+from collections import Counter
+
+import httpx
+import uvicorn
+
+from benchmarks.fakes import (
+    ComfyUIConfig,
+    OllamaConfig,
+    fake_comfyui_app,
+    fake_ollama_app,
+    fake_supabase_app,
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def serve(app, port: int) -> tuple[uvicorn.Server, asyncio.Task]:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_conversation(client: httpx.AsyncClient, session_id: str, rounds: int, metrics: dict):
+    response = await client.post("/api/chat/conversations", json={"session_id": session_id})
+    response.raise_for_status()
+    conv_id = response.json()["id"]
+
+    for round_number in range(rounds):
+        started = time.perf_counter()
+        first_token = None
+        events = 0
+        async with client.stream(
+            "POST",
+            f"/api/chat/conversations/{conv_id}/messages",
+            json={"content": f"Idea {round_number}: a lighthouse at dusk"},
+        ) as stream:
+            async for line in stream.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                events += 1
+                if first_token is None and '"specialist_chunk"' in line:
+                    first_token = time.perf_counter() - started
+
+        metrics["round_latency"].append(time.perf_counter() - started)
+        metrics["events"] += events
+        if first_token is not None:
+            metrics["ttft"].append(first_token)
+
+
+async def run_generation(client: httpx.AsyncClient, conversation_id: str, metrics: dict):
+    started = time.perf_counter()
+    response = await client.post("/api/generations/", json={
+        "conversation_id": conversation_id,
+        "prompt": "a lighthouse at dusk",
+        "parameters": {"steps": 20},
+    })
+    response.raise_for_status()
+    generation_id = response.json()["id"]
+
+    # Follow the pushed status stream until the generation finishes
+    async with client.stream("GET", f"/api/generations/{generation_id}/events") as stream:
+        async for line in stream.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line.removeprefix("data:"))
+            if event.get("status") in ("complete", "failed"):
+                metrics["generation_latency"].append(time.perf_counter() - started)
+                metrics["generation_status"][event["status"]] += 1
+                return
+
+
+async def main(args: argparse.Namespace) -> dict:
+    supabase = fake_supabase_app()
+    ollama = fake_ollama_app(OllamaConfig(
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        ttft=args.ttft,
+        swap_delay=args.swap_delay,
+        parallel=args.ollama_parallel,
+    ))
+    comfyui = fake_comfyui_app(ComfyUIConfig(step_delay=args.step_delay))
+
+    fakes = [(supabase, free_port()), (ollama, free_port()), (comfyui, free_port())]
+    servers = [await serve(app, port) for app, port in fakes]
+    (_, supabase_port), (_, ollama_port), (_, comfyui_port) = fakes
+
+    # Settings are read at import time, so point the backend at the fakes first
+    os.environ.update({
+        "SUPABASE_URL": f"http://127.0.0.1:{supabase_port}",
+        "SUPABASE_KEY": "bench.bench.bench",
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{ollama_port}",
+        "COMFYUI_BASE_URL": f"http://127.0.0.1:{comfyui_port}",
+    })
+    from app.main import app
+
+    app_port = free_port()
+    servers.append(await serve(app, app_port))
+    calls = supabase.state.calls
+
+    metrics = {
+        "ttft": [],
+        "round_latency": [],
+        "events": 0,
+        "generation_latency": [],
+        "generation_status": Counter(),
+    }
+
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", timeout=None) as client:
+            session = (await client.post("/api/sessions/", json={
+                "model_assignments": dict.fromkeys(
+                    ["style", "composition", "story", "technical", "critic"], "llama3.2",
+                ),
+                "settings": {"execution_mode": args.execution_mode},
+            })).json()
+
+            calls_before = sum(calls.values())
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                run_conversation(client, session["id"], args.rounds, metrics)
+                for _ in range(args.conversations)
+            ))
+            chat_seconds = time.perf_counter() - started
+            # Let the write-behind queues drain before counting
+            await asyncio.sleep(0.5)
+            chat_calls = sum(calls.values()) - calls_before
+
+            conversation = (await client.post("/api/chat/conversations", json={"session_id": session["id"]})).json()
+            calls_before = sum(calls.values())
+            await asyncio.gather(*(
+                run_generation(client, conversation["id"], metrics)
+                for _ in range(args.generations)
+            ))
+            await asyncio.sleep(0.5)
+            generation_calls = sum(calls.values()) - calls_before
+    finally:
+        for server, task in reversed(servers):
+            server.should_exit = True
+            await task
+
+    total_rounds = args.conversations * args.rounds
+    return {
+        "conversations": args.conversations,
+        "rounds": total_rounds,
+        "ttft_p50_ms": round(percentile(metrics["ttft"], 50) * 1000, 1),
+        "ttft_p99_ms": round(percentile(metrics["ttft"], 99) * 1000, 1),
+        "round_latency_p50_ms": round(percentile(metrics["round_latency"], 50) * 1000, 1),
+        "round_latency_p99_ms": round(percentile(metrics["round_latency"], 99) * 1000, 1),
+        "events_per_second": round(metrics["events"] / chat_seconds, 1) if chat_seconds else 0.0,
+        "db_calls_per_round": round(chat_calls / total_rounds, 2) if total_rounds else 0.0,
+        "model_swaps": ollama.state.stats["swaps"],
+        "generations": args.generations,
+        "generation_status": dict(metrics["generation_status"]),
+        "generation_latency_p50_ms": round(percentile(metrics["generation_latency"], 50) * 1000, 1),
+        "generation_latency_p99_ms": round(percentile(metrics["generation_latency"], 99) * 1000, 1),
+        "db_calls_per_generation": round(generation_calls / args.generations, 2) if args.generations else 0.0,
+        "comfyui_prompts": comfyui.state.stats["prompts"],
+        "db_calls": dict(calls),
+        "storage_calls": dict(supabase.state.storage_calls),
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--execution-mode", choices=["sequential", "parallel"], default="sequential")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--response-tokens", type=int, default=40)
+    parser.add_argument("--ttft", type=float, default=0.05, help="Fake Ollama time to first token (s)")
+    parser.add_argument("--swap-delay", type=float, default=0.5, help="Fake Ollama model swap delay (s)")
+    parser.add_argument("--ollama-parallel", type=int, default=4)
+    parser.add_argument("--step-delay", type=float, default=0.01, help="Fake ComfyUI time per sampling step (s)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:28} {value}")
@@ -15,3 +15,151 @@ async def test_comfyui_queue_workflow():
     with patch.object(client._client, 'post', new_callable=AsyncMock, return_value=mock_response):
         prompt_id = await client.queue_workflow({"test": "workflow"})
         assert prompt_id == "test-123"
+
+
+@pytest.mark.asyncio
+async def test_comfyui_watch_progress_uses_events():
+    import asyncio
+    from app.services.comfyui import ComfyUIClient
+
+    client = ComfyUIClient()
+    client.start_events = MagicMock()
+
+    async def feed_events():
+        await asyncio.sleep(0)
+        for message in [
+            {"type": "progress", "data": {"value": 5, "max": 20, "prompt_id": "p1"}},
+            {"type": "progress", "data": {"value": 1, "max": 20, "prompt_id": "other"}},
+            {"type": "executed", "data": {"node": "9", "output": {"images": [{"filename": "a.png"}]}, "prompt_id": "p1"}},
+            {"type": "executing", "data": {"node": None, "prompt_id": "p1"}},
+        ]:
+            client._dispatch_event(message)
+
+    with patch.object(client, "get_progress", new_callable=AsyncMock) as mock_poll:
+        feeder = asyncio.create_task(feed_events())
+        updates = [update async for update in client.watch_progress("p1")]
+        await feeder
+
+    mock_poll.assert_not_called()
+    assert updates == [
+        {"status": "running", "progress": 25},
+        {"status": "complete", "outputs": {"9": {"images": [{"filename": "a.png"}]}}},
+    ]
+    assert client._watchers == {}
+
+
+@pytest.mark.asyncio
+async def test_comfyui_watch_progress_falls_back_to_polling():
+    from app.services.comfyui import ComfyUIClient
+
+    client = ComfyUIClient()
+    client.start_events = MagicMock()
+    client.min_poll_interval = 0.01
+
+    polls = [
+        {"status": "running", "progress": 0},
+        {"status": "complete", "outputs": {"9": {}}},
+    ]
+
+    with patch.object(client, "get_progress", new_callable=AsyncMock, side_effect=polls):
+        updates = [update async for update in client.watch_progress("p1")]
+
+    assert updates == [{"status": "complete", "outputs": {"9": {}}}]
+
+
+def fake_comfyui(queue_depth: int = 0, healthy: bool = True):
+    """In-process fake ComfyUI answering health and queue requests."""
+    import httpx
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not healthy:
+            raise httpx.ConnectError("Connection refused", request=request)
+        if request.url.path == "/system_stats":
+            return httpx.Response(200, json={"system": {}})
+        if request.url.path == "/queue":
+            return httpx.Response(200, json={"queue_running": [["r"]] if queue_depth else [], "queue_pending": [["p"]] * max(0, queue_depth - 1)})
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+def make_pool(*servers, max_concurrency=1):
+    import httpx
+    from app.services.comfyui import ComfyUIPool
+
+    pool = ComfyUIPool([f"http://comfy-{i}:8188" for i in range(len(servers))], max_concurrency=max_concurrency)
+    pool.start_health_checks = MagicMock()
+    for backend, transport in zip(pool.backends, servers):
+        backend.client._client = httpx.AsyncClient(base_url=backend.client.base_url, transport=transport)
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_comfyui_pool_prefers_loaded_checkpoint_then_shortest_queue():
+    pool = make_pool(fake_comfyui(queue_depth=3), fake_comfyui(queue_depth=0), fake_comfyui(healthy=False), max_concurrency=2)
+
+    first = await pool.acquire("sdxl.safetensors")
+    assert first is pool.backends[1].client
+    assert pool.backends[2].healthy is False
+
+    # Another backend is idle-ish, but the SDXL one avoids a checkpoint swap
+    pool.backends[0].queue_depth = 0
+    second = await pool.acquire("sdxl.safetensors")
+    assert second is pool.backends[1].client
+
+    # A different checkpoint goes to the least loaded backend
+    third = await pool.acquire("sd15.safetensors")
+    assert third is pool.backends[0].client
+
+    await pool.release(first)
+    assert pool.backends[1].active == 1
+
+
+@pytest.mark.asyncio
+async def test_comfyui_pool_raises_without_healthy_backend():
+    from app.services.comfyui import ComfyUIUnavailableError
+
+    pool = make_pool(fake_comfyui(healthy=False))
+    with pytest.raises(ComfyUIUnavailableError):
+        await pool.acquire("sdxl.safetensors")
+
+
+@pytest.mark.asyncio
+async def test_comfyui_pool_probes_use_short_timeout():
+    import httpx
+    from app.config import settings
+
+    timeouts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        timeouts.append(request.extensions["timeout"]["read"])
+        if request.url.path == "/system_stats":
+            return httpx.Response(200, json={})
+        return httpx.Response(200, json={"queue_running": [], "queue_pending": []})
+
+    pool = make_pool(httpx.MockTransport(handler))
+    await pool.refresh()
+
+    assert timeouts == [settings.comfyui_probe_timeout] * 2
+
+
+@pytest.mark.asyncio
+async def test_comfyui_health_loop_survives_refresh_errors():
+    import asyncio
+    from app.services.comfyui import ComfyUIPool
+
+    pool = ComfyUIPool(["http://comfy-0:8188"], health_interval=0.01)
+    calls = []
+
+    async def refresh():
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError("Unexpected probe error")
+
+    pool.refresh = refresh
+
+    task = asyncio.create_task(pool._health_loop())
+    await asyncio.sleep(0.035)
+    task.cancel()
+
+    assert len(calls) >= 2
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_event_buffer_resumes_after_last_event_id():
+    from app.core.events import EventBuffer
+
+    buffer = EventBuffer()
+    buffer.start()
+    for i in range(3):
+        await buffer.publish({"type": "specialist_chunk", "content": str(i)})
+
+    async def consume(last_event_id):
+        return [(event_id, event["content"]) async for event_id, event in buffer.subscribe(last_event_id)]
+
+    # A reconnecting client waits for the live round, then gets only what it missed
+    resumed = asyncio.create_task(consume(1))
+    await asyncio.sleep(0)
+    await buffer.publish({"type": "specialist_chunk", "content": "3"})
+    await buffer.finish()
+
+    assert await resumed == [(2, "1"), (3, "2"), (4, "3")]
+    assert await consume(4) == []
+
+
+@pytest.mark.asyncio
+async def test_event_buffer_requests_resync_when_events_were_dropped():
+    from app.core.events import EventBuffer
+
+    buffer = EventBuffer(max_events=2)
+    buffer.start()
+    for i in range(4):
+        await buffer.publish({"type": "specialist_chunk", "content": str(i)})
+    await buffer.finish()
+
+    events = [(event_id, event["type"]) async for event_id, event in buffer.subscribe(1)]
+    assert events == [(None, "resync"), (3, "specialist_chunk"), (4, "specialist_chunk")]
+
+
+@pytest.mark.asyncio
+async def test_event_buffer_requests_resync_for_cursor_ahead_of_buffer():
+    from app.core.events import EventBuffer
+
+    # A recreated buffer numbers from 1 again while the client still holds 57
+    buffer = EventBuffer()
+    buffer.start()
+    for i in range(3):
+        await buffer.publish({"type": "specialist_chunk", "content": str(i)})
+    await buffer.finish()
+
+    events = [(event_id, event["type"]) async for event_id, event in buffer.subscribe(57)]
+    assert events == [
+        (None, "resync"),
+        (1, "specialist_chunk"),
+        (2, "specialist_chunk"),
+        (3, "specialist_chunk"),
+    ]
+
+
+def test_event_buffer_store_keeps_active_buffers():
+    from app.core.events import EventBufferStore
+
+    store = EventBufferStore(max_size=1)
+    store.get_or_create("a").start()
+    store.get_or_create("b")
+    store.get_or_create("c")
+
+    assert store.get("a") is not None
+    assert store.get("b") is None
+    assert store.get("c") is not None
+
+
+@pytest.mark.asyncio
+async def test_event_buffer_cancels_round_without_subscribers():
+    from app.core.events import EventBuffer
+
+    buffer = EventBuffer(disconnect_grace=0)
+    buffer.start()
+    buffer.task = asyncio.create_task(asyncio.sleep(60))
+    await buffer.publish({"type": "specialist_chunk"})
+
+    subscription = buffer.subscribe(0)
+    await subscription.__anext__()
+    assert buffer.subscribers == 1
+
+    # The client disconnects: sse-starlette closes the generator
+    await subscription.aclose()
+    await asyncio.sleep(0.01)
+
+    assert buffer.subscribers == 0
+    assert buffer.task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_chunks_merges_by_role_and_preserves_order():
+    from app.core.events import coalesce_chunks
+
+    async def source():
+        yield {"type": "specialist_start", "role": "style", "name": "Luna"}
+        for token in ["Deep", " teals", " and"]:
+            yield {"type": "specialist_chunk", "role": "style", "name": "Luna", "content": token}
+        yield {"type": "specialist_chunk", "role": "story", "name": "Saga", "content": "Once"}
+        yield {"type": "specialist_end", "role": "story", "name": "Saga", "content": "Once"}
+
+    events = [event async for event in coalesce_chunks(source(), window=10)]
+
+    assert events == [
+        {"type": "specialist_start", "role": "style", "name": "Luna"},
+        {"type": "specialist_chunk", "role": "style", "content": "Deep teals and"},
+        {"type": "specialist_chunk", "role": "story", "content": "Once"},
+        {"type": "specialist_end", "role": "story", "name": "Saga", "content": "Once"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_chunks_merges_interleaved_roles():
+    from app.core.events import coalesce_chunks
+
+    async def source():
+        # Parallel rounds interleave specialists token by token
+        for index in range(50):
+            for role in ("style", "composition", "story"):
+                yield {"type": "specialist_chunk", "role": role, "name": role, "content": str(index % 10)}
+        yield {"type": "specialist_end", "role": "style", "name": "Luna", "content": ""}
+        yield {"type": "specialist_chunk", "role": "story", "name": "Saga", "content": "!"}
+
+    events = [event async for event in coalesce_chunks(source(), window=10)]
+
+    digits = "0123456789" * 5
+    assert events == [
+        {"type": "specialist_chunk", "role": "style", "content": digits},
+        {"type": "specialist_chunk", "role": "composition", "content": digits},
+        {"type": "specialist_chunk", "role": "story", "content": digits},
+        {"type": "specialist_end", "role": "style", "name": "Luna", "content": ""},
+        {"type": "specialist_chunk", "role": "story", "content": "!"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_chunks_flushes_on_window_and_size():
+    from app.core.events import coalesce_chunks
+
+    async def source():
+        yield {"type": "specialist_chunk", "role": "style", "name": "Luna", "content": "a"}
+        yield {"type": "specialist_chunk", "role": "style", "name": "Luna", "content": "b"}
+        await asyncio.sleep(0.1)  # Stall longer than the window
+        yield {"type": "specialist_chunk", "role": "style", "name": "Luna", "content": "cdef"}
+        yield {"type": "specialist_chunk", "role": "style", "name": "Luna", "content": "g"}
+
+    contents = [event["content"] async for event in coalesce_chunks(source(), window=0.02, max_chars=4)]
+
+    assert contents == ["ab", "cdef", "g"]
@@ -0,0 +1,98 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+@pytest.mark.asyncio
+async def test_hub_routes_events_to_generation_and_conversation_streams():
+    from app.services.generation_events import GenerationEventHub
+
+    hub = GenerationEventHub(queue_size=2)
+    by_generation = hub.subscribe(generation_id="gen-1")
+    by_conversation = hub.subscribe(conversation_id="conv-1")
+
+    hub.track("gen-1", "conv-1")
+    hub.publish("gen-1", {"status": "running", "progress": 0})
+    hub.publish("gen-1", {"progress": 40})
+    hub.publish("gen-1", {"status": "complete", "progress": 100, "outputs": [{"key": "abc.png"}]})
+
+    # Slow subscribers keep the newest events
+    assert by_generation.qsize() == 2
+    assert (await by_generation.get())["progress"] == 40
+    last = await by_generation.get()
+    assert last["status"] == "complete" and last["conversation_id"] == "conv-1"
+    assert by_conversation.qsize() == 2
+
+    # Finished generations are no longer tracked; unsubscribed queues get nothing
+    hub.unsubscribe(by_conversation)
+    hub.publish("gen-1", {"progress": 100})
+    assert by_conversation.qsize() == 2
+    assert "conversation_id" not in (await by_generation.get())
+
+
+@pytest.mark.asyncio
+async def test_status_writer_publishes_changes():
+    from app.services.generation_events import GenerationEventHub
+    from app.services.generation_status import GenerationStatusWriter
+
+    db = MagicMock()
+    db.table.return_value.update.return_value.eq.return_value.execute = AsyncMock()
+    hub = GenerationEventHub()
+    queue = hub.subscribe(generation_id="a")
+    writer = GenerationStatusWriter()
+    writer._start_flusher = MagicMock()
+
+    with patch("app.services.generation_status.get_async_supabase_client", new_callable=AsyncMock, return_value=db), \
+            patch("app.services.generation_status.get_generation_events", return_value=hub):
+        await writer.write("a", {"status": "running", "progress": 0})
+        writer.update_progress("a", 5)
+        writer.update_progress("a", 5)
+        await writer.write("a", {"status": "complete", "parameters": {"prompt_id": "p"}, "outputs": []})
+
+    events = [queue.get_nowait() for _ in range(queue.qsize())]
+    assert events == [
+        {"id": "a", "status": "running", "progress": 0},
+        {"id": "a", "progress": 5},
+        {"id": "a", "status": "complete", "outputs": []},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hub_reconnects_listener_with_backoff():
+    import asyncio
+    from app.services import generation_events
+    from app.services.generation_events import GenerationEventHub
+
+    connections = []
+
+    async def connect(dsn):
+        if len(connections) == 1:
+            connections.append(None)
+            raise OSError("Connection refused")
+        connection = MagicMock()
+        connection.add_listener = AsyncMock()
+        connection.close = AsyncMock()
+        connections.append(connection)
+        return connection
+
+    fake_asyncpg = MagicMock()
+    fake_asyncpg.connect = connect
+    hub = GenerationEventHub()
+    hub.reconnect_delay = 0.01
+
+    with patch.object(generation_events, "asyncpg", fake_asyncpg), \
+            patch.object(generation_events.settings, "generation_events_dsn", "postgresql://localhost/db"):
+        await hub.start()
+        assert hub.listening
+
+        # The database drops the connection: events fall back to in-process
+        first = connections[0]
+        hub._on_terminated(first)
+        assert not hub.listening
+        await asyncio.sleep(0.05)
+
+        # One failed attempt, then a backed-off retry that succeeds
+        assert connections[1] is None
+        assert hub.listening and hub._connection is connections[2]
+        await hub.close()
+
+    connections[2].close.assert_awaited_once()
@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+def mock_db():
+    db = MagicMock()
+    db.table.return_value.update.return_value.eq.return_value.execute = AsyncMock()
+    db.rpc.return_value.execute = AsyncMock()
+    return db
+
+
+@pytest.mark.asyncio
+async def test_status_writer_coalesces_progress():
+    from app.services.generation_status import GenerationStatusWriter
+
+    db = mock_db()
+    writer = GenerationStatusWriter(min_delta=10, max_interval=5.0)
+    writer._start_flusher = MagicMock()
+
+    with patch("app.services.generation_status.get_async_supabase_client", new_callable=AsyncMock, return_value=db), \
+            patch("app.services.generation_status.time.monotonic", return_value=100.0):
+        await writer.write("a", {"status": "running", "progress": 0})
+        await writer.write("b", {"status": "running", "progress": 0})
+        await writer.write("a", {"status": "running"})  # No-op
+        assert db.table.return_value.update.call_count == 2
+
+        writer.update_progress("a", 3)
+        writer.update_progress("a", 12)
+        writer.update_progress("b", 4)
+        await writer.flush()
+
+    # Only "a" moved far enough to be due; "b" waits for the interval
+    db.rpc.assert_called_once_with("update_generation_progress", {"updates": [{"id": "a", "progress": 12}]})
+
+    with patch("app.services.generation_status.get_async_supabase_client", new_callable=AsyncMock, return_value=db), \
+            patch("app.services.generation_status.time.monotonic", return_value=106.0):
+        writer.update_progress("a", 12)  # Already written
+        await writer.flush()
+
+    assert db.rpc.call_args.args[1] == {"updates": [{"id": "b", "progress": 4}]}
+
+
+@pytest.mark.asyncio
+async def test_status_writer_writes_terminal_status_immediately():
+    from app.services.generation_status import GenerationStatusWriter
+
+    db = mock_db()
+    writer = GenerationStatusWriter(min_delta=10, max_interval=5.0)
+    writer._start_flusher = MagicMock()
+
+    with patch("app.services.generation_status.get_async_supabase_client", new_callable=AsyncMock, return_value=db):
+        writer.update_progress("a", 50)
+        await writer.write("a", {"status": "complete", "progress": 100})
+        await writer.flush(force=True)
+
+    db.table.return_value.update.assert_called_once_with({"status": "complete", "progress": 100})
+    db.rpc.assert_not_called()
@@ -0,0 +1,187 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+def fake_comfyui(events: list[dict]) -> MagicMock:
+    comfyui = MagicMock()
+    comfyui.queue_workflow = AsyncMock(return_value="prompt-1")
+
+    async def watch_progress(prompt_id):
+        for event in events:
+            yield event
+
+    comfyui.watch_progress = watch_progress
+    return comfyui
+
+
+def fake_status_writer() -> MagicMock:
+    writer = MagicMock()
+    writer.writes = []
+
+    async def write(generation_id, fields):
+        writer.writes.append((generation_id, fields.get("status")))
+
+    writer.write = write
+    return writer
+
+
+@pytest.mark.asyncio
+async def test_outputs_are_ingested_after_the_backend_is_released_and_outside_the_timeout():
+    from app.api.routes import generations
+
+    comfyui = fake_comfyui([{"status": "complete", "outputs": {"9": {"images": [{"filename": "a.png"}]}}}])
+    pool = MagicMock()
+    pool.acquire = AsyncMock(return_value=comfyui)
+    pool.release = AsyncMock()
+    writer = fake_status_writer()
+
+    async def slow_ingest(client, storage, outputs):
+        assert client is comfyui
+        pool.release.assert_awaited_once_with(comfyui)
+        await asyncio.sleep(0.05)
+        return [{"key": "a.png"}]
+
+    with patch.object(generations, "get_comfyui", return_value=pool), \
+            patch.object(generations, "get_status_writer", return_value=writer), \
+            patch.object(generations, "get_storage_client"), \
+            patch.object(generations, "ingest_outputs", side_effect=slow_ingest), \
+            patch.object(generations.settings, "comfyui_generation_timeout", 0.01):
+        status = await generations._run_generation("gen-1", {"3": {}}, None)
+
+    assert status == "complete"
+    assert writer.writes == [("gen-1", "running"), ("gen-1", "complete")]
+    pool.release.assert_awaited_once()
+
+
+def fake_db(cached: list[dict] | None = None) -> MagicMock:
+    """Supabase mock: inserts echo back with sequential ids; memo lookups return `cached`."""
+    db = MagicMock()
+    db.inserts = []
+    lookup = db.table.return_value.select.return_value.eq.return_value.eq.return_value.limit.return_value
+    lookup.execute = AsyncMock(return_value=MagicMock(data=cached or []))
+
+    def insert(row):
+        db.inserts.append(row)
+        query = MagicMock()
+        query.execute = AsyncMock(return_value=MagicMock(data=[{"id": f"gen-{len(db.inserts)}", **row}]))
+        return query
+
+    db.table.return_value.insert.side_effect = insert
+    return db
+
+
+@pytest.fixture
+def single_flight():
+    from app.api.routes import generations
+
+    generations.running_workflows.clear()
+    generations.waiting_generations.clear()
+    yield
+    generations.running_workflows.clear()
+    generations.waiting_generations.clear()
+
+
+async def create(db: MagicMock, submit: AsyncMock, seed: int | None = 42) -> dict:
+    from app.api.routes import generations
+    from app.models.generation import GenerationCreate
+
+    data = GenerationCreate(
+        conversation_id="00000000-0000-0000-0000-000000000001",
+        prompt="a lighthouse at dusk",
+        parameters={"seed": seed} if seed is not None else {},
+    )
+    with patch.object(generations, "get_db", new_callable=AsyncMock, return_value=db), \
+            patch.object(generations.scheduler, "submit", submit), \
+            patch.object(generations.settings, "generation_memoize", True):
+        return await generations.create_generation(data)
+
+
+@pytest.mark.asyncio
+async def test_fixed_seed_repeat_reuses_completed_outputs(single_flight):
+    db = fake_db(cached=[{"id": "earlier", "outputs": [{"key": "abc.png"}]}])
+    submit = AsyncMock(return_value=0)
+
+    generation = await create(db, submit)
+
+    assert generation["status"] == "complete"
+    assert generation["outputs"] == [{"key": "abc.png"}]
+    assert generation["parameters"]["memoized_from"] == "earlier"
+    submit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_random_seed_is_never_memoized(single_flight):
+    db = fake_db(cached=[{"id": "earlier", "outputs": [{"key": "abc.png"}]}])
+    submit = AsyncMock(return_value=0)
+
+    first = await create(db, submit, seed=None)
+    second = await create(db, submit, seed=None)
+
+    assert first["status"] == second["status"] == "queued"
+    assert submit.await_count == 2
+
+
+async def run_leader_with_follower(events: list[dict], ingest) -> tuple[MagicMock, str]:
+    """Queue two identical fixed-seed requests and run the one job they share."""
+    from app.api.routes import generations
+
+    db = fake_db()
+    submit = AsyncMock(return_value=0)
+    leader = await create(db, submit)
+    follower = await create(db, submit)
+
+    submit.assert_awaited_once()
+    assert generations.waiting_generations == {leader["id"]: [follower["id"]]}
+
+    pool = MagicMock()
+    pool.acquire = AsyncMock(return_value=fake_comfyui(events))
+    pool.release = AsyncMock()
+    writer = fake_status_writer()
+    with patch.object(generations, "get_comfyui", return_value=pool), \
+            patch.object(generations, "get_status_writer", return_value=writer), \
+            patch.object(generations, "get_storage_client"), \
+            patch.object(generations, "ingest_outputs", side_effect=ingest):
+        status = await generations._run_generation(leader["id"], submit.await_args.args[1], None)
+
+    assert generations.running_workflows == {}
+    assert generations.waiting_generations == {}
+    return writer, status
+
+
+@pytest.mark.asyncio
+async def test_follower_mirrors_completed_leader(single_flight):
+    writer, status = await run_leader_with_follower(
+        [{"status": "progress", "progress": 50}, {"status": "complete", "outputs": {}}],
+        AsyncMock(return_value=[{"key": "abc.png"}]),
+    )
+
+    assert status == "complete"
+    assert writer.writes == [
+        ("gen-1", "running"), ("gen-2", "running"),
+        ("gen-1", "complete"), ("gen-2", "complete"),
+    ]
+    assert writer.update_progress.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_follower_fails_with_leader(single_flight):
+    writer, status = await run_leader_with_follower(
+        [{"status": "failed", "error": "Out of memory"}],
+        AsyncMock(),
+    )
+
+    assert status == "failed"
+    assert writer.writes[-2:] == [("gen-1", "failed"), ("gen-2", "failed")]
+
+
+@pytest.mark.asyncio
+async def test_follower_fails_when_leader_ingest_fails(single_flight):
+    writer, status = await run_leader_with_follower(
+        [{"status": "complete", "outputs": {}}],
+        AsyncMock(side_effect=RuntimeError("Storage unavailable")),
+    )
+
+    assert status == "failed"
+    assert writer.writes[-2:] == [("gen-1", "failed"), ("gen-2", "failed")]
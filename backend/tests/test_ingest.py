@@ -0,0 +1,60 @@
+import hashlib
+
+import httpx
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_ingest_streams_outputs_to_content_addressed_keys():
+    from app.core.ingest import ingest_outputs
+    from app.services.comfyui import ComfyUIClient
+    from app.services.storage import StorageClient
+
+    image = b"\x89PNG" + b"x" * 600_000
+    stored_objects: dict[str, bytes] = {}
+
+    def comfyui_handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/view"
+        return httpx.Response(200, content=image)
+
+    async def storage_handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/storage/v1/object/generations/")
+        if request.method == "HEAD":
+            return httpx.Response(200 if path in stored_objects else 400)
+        stored_objects[path] = b"".join([chunk async for chunk in request.stream])
+        return httpx.Response(200, json={"Key": path})
+
+    comfyui = ComfyUIClient("http://comfy:8188")
+    comfyui._client = httpx.AsyncClient(base_url=comfyui.base_url, transport=httpx.MockTransport(comfyui_handler))
+    storage = StorageClient("http://supabase:54321", key="test-key", bucket="generations")
+    storage._client = httpx.AsyncClient(base_url=storage.base_url, transport=httpx.MockTransport(storage_handler))
+
+    outputs = {
+        "9": {"images": [
+            {"filename": "a_00001_.png", "subfolder": "", "type": "output"},
+            {"filename": "a_00002_.png", "subfolder": "", "type": "output"},
+        ]},
+    }
+    stored = await ingest_outputs(comfyui, storage, outputs)
+
+    key = hashlib.sha256(image).hexdigest() + ".png"
+    assert [item["key"] for item in stored] == [key, key]
+    assert stored[0]["url"].endswith(f"/object/public/generations/{key}")
+    assert stored[0]["size"] == len(image)
+    assert stored[0]["content_type"] == "image/png"
+    assert list(stored_objects) == [key]  # Identical outputs uploaded once
+    assert stored_objects[key] == image
+
+
+def test_split_batch_outputs_by_batch_index():
+    from app.core.ingest import split_batch_outputs
+
+    outputs = {
+        "9": {"images": [{"filename": "a.png"}, {"filename": "b.png"}]},
+        "10": {"gifs": [{"filename": "sheet.gif"}]},
+    }
+
+    variants = split_batch_outputs(outputs, 2)
+
+    assert variants[0] == {"9": {"images": [{"filename": "a.png"}]}, "10": {"gifs": [{"filename": "sheet.gif"}]}}
+    assert variants[1] == {"9": {"images": [{"filename": "b.png"}]}}
@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import patch
+
+
+def make_history(count: int, size: int = 400) -> list[dict]:
+    return [{"role": "user", "role_name": "User", "content": f"{i}:" + "x" * size} for i in range(count)]
+
+
+def test_window_start_respects_token_budget():
+    from app.core.memory import estimate_tokens, window_start
+
+    history = make_history(10)
+    per_message = estimate_tokens(history[0]["content"])
+
+    assert window_start(history, per_message * 3) == 7
+    assert window_start(history, 10_000) == 0
+    assert window_start(history, 1) == 9  # The newest message is always kept
+    assert window_start(history, 10_000, floor=4) == 4
+
+
+@pytest.mark.asyncio
+async def test_memory_summarizes_only_when_turns_age_out():
+    from app.core.memory import ConversationMemory, estimate_tokens
+
+    summaries = []
+
+    async def mock_generate(*args, **kwargs):
+        summaries.append(kwargs["prompt"])
+        yield {"response": f"summary {len(summaries)}", "done": True}
+
+    history = make_history(4)
+    budget = estimate_tokens(history[0]["content"]) * 3 + 10
+
+    with patch("app.core.memory.get_ollama_client") as mock_client, \
+            patch.dict("app.core.memory.settings.model_history_budgets", {"tiny": budget}):
+        mock_client.return_value.generate = mock_generate
+        memory = ConversationMemory()
+
+        summary, recent = await memory.window(history, "tiny")
+        assert summary == "summary 1"
+        assert [m["content"][:2] for m in recent] == ["1:", "2:", "3:"]
+
+        # Nothing new aged out: the cached summary is reused
+        summary, recent = await memory.window(history, "tiny")
+        assert len(summaries) == 1
+
+        history.append({"role": "user", "role_name": "User", "content": "4:" + "x" * 400})
+        summary, recent = await memory.window(history, "tiny")
+        assert summary == "summary 2"
+        assert "summary 1" in summaries[1] and "1:" in summaries[1] and "0:" not in summaries[1]
+        assert memory.summarized_upto == 2
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+def mock_db(execute):
+    db = MagicMock()
+    db.table.return_value.insert.return_value.execute = execute
+    return db
+
+
+@pytest.mark.asyncio
+async def test_message_writer_batches_rows_in_order():
+    from app.services.message_writer import MessageWriter
+
+    db = mock_db(AsyncMock())
+    writer = MessageWriter(batch_size=3, flush_interval=10, durability="fire_and_forget")
+
+    with patch("app.services.message_writer.get_async_supabase_client", new_callable=AsyncMock, return_value=db):
+        for i in range(3):
+            await writer.write({"conversation_id": "a" if i % 2 else "b", "content": str(i)})
+        await asyncio.sleep(0.01)  # Batch size reached, flusher wakes up
+        await writer.write({"conversation_id": "a", "content": "3"})
+        await writer.close()  # Shutdown flushes the rest
+
+    batches = [call.args[0] for call in db.table.return_value.insert.call_args_list]
+    assert [[row["content"] for row in batch] for batch in batches] == [["0", "1", "2"], ["3"]]
+    created = [row["created_at"] for batch in batches for row in batch]
+    assert created == sorted(created) and len(set(created)) == 4
+
+
+@pytest.mark.asyncio
+async def test_message_writer_await_durability_reports_failures():
+    from app.services.message_writer import MessageWriter
+
+    db = mock_db(AsyncMock(side_effect=RuntimeError("db down")))
+    writer = MessageWriter(batch_size=10, flush_interval=0.01, durability="await", retry_backoff=0.01)
+
+    with patch("app.services.message_writer.get_async_supabase_client", new_callable=AsyncMock, return_value=db):
+        with pytest.raises(RuntimeError):
+            await writer.write({"conversation_id": "a", "content": "hi"})
+
+        # Fire-and-forget rows stay queued for a retry instead
+        db.table.return_value.insert.return_value.execute = AsyncMock(side_effect=[RuntimeError("db down"), None])
+        await writer.write({"conversation_id": "a", "content": "again"}, wait=False)
+        await asyncio.sleep(0.1)
+
+    assert db.table.return_value.insert.return_value.execute.await_count == 2
+    assert writer._pending == []
+
+
+@pytest.mark.asyncio
+async def test_message_writer_close_waits_for_inflight_insert():
+    from app.services.message_writer import MessageWriter
+
+    inserted = []
+
+    async def slow_insert():
+        await asyncio.sleep(0.2)
+        inserted.extend(db.table.return_value.insert.call_args.args[0])
+
+    db = mock_db(AsyncMock(side_effect=slow_insert))
+    writer = MessageWriter(batch_size=10, flush_interval=0.01, durability="fire_and_forget")
+
+    with patch("app.services.message_writer.get_async_supabase_client", new_callable=AsyncMock, return_value=db):
+        await writer.write({"conversation_id": "a", "content": "hi"})
+        await asyncio.sleep(0.05)  # The flusher is now mid-insert
+        await writer.close()
+
+    assert [row["content"] for row in inserted] == ["hi"]
+    assert writer._pending == []
+
+
+@pytest.mark.asyncio
+async def test_message_writer_cancelled_flush_keeps_rows_queued():
+    from app.services.message_writer import MessageWriter
+
+    async def hang():
+        await asyncio.sleep(1)
+
+    db = mock_db(AsyncMock(side_effect=hang))
+    writer = MessageWriter(batch_size=10, flush_interval=10, durability="fire_and_forget")
+    writer._start_flusher = MagicMock()
+
+    with patch("app.services.message_writer.get_async_supabase_client", new_callable=AsyncMock, return_value=db):
+        await writer.write({"conversation_id": "a", "content": "hi"})
+        flush = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0.01)
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+
+    assert [row["content"] for row, _, _ in writer._pending] == ["hi"]
+
+
+@pytest.mark.asyncio
+async def test_message_writer_logs_dropped_rows_after_backing_off(caplog):
+    from app.services.message_writer import MessageWriter
+
+    db = mock_db(AsyncMock(side_effect=RuntimeError("db down")))
+    writer = MessageWriter(
+        batch_size=10, flush_interval=0.001, durability="fire_and_forget", max_attempts=3, retry_backoff=0.1,
+    )
+
+    with patch("app.services.message_writer.get_async_supabase_client", new_callable=AsyncMock, return_value=db):
+        await writer.write({"conversation_id": "a", "role": "user", "content": "hi"})
+        await asyncio.sleep(0.05)
+        # The second attempt waits out the backoff
+        assert db.table.return_value.insert.return_value.execute.await_count == 1
+        await writer.close()
+
+    assert db.table.return_value.insert.return_value.execute.await_count == 3
+    assert writer._pending == []
+    assert "Dropping user message of conversation a after 3 attempts" in caplog.text
@@ -0,0 +1,77 @@
+import json
+
+import httpx
+import pytest
+
+
+def test_histogram_renders_cumulative_buckets():
+    from app.core.metrics import Counter, Histogram, MetricsRegistry
+
+    registry = MetricsRegistry()
+    latency = registry.register(Histogram("request_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)))
+    errors = registry.register(Counter("errors_total", "Errors.", ("route",)))
+
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(5.0, route="/a")
+    errors.inc(route='say "hi"')
+
+    text = registry.render()
+    assert 'request_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'request_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'request_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'request_seconds_count{route="/a"} 3' in text
+    assert 'errors_total{route="say \\"hi\\""} 1.0' in text
+    assert "# TYPE request_seconds histogram" in text
+
+
+@pytest.mark.asyncio
+async def test_ollama_generate_records_ttft_and_speed():
+    from app.core.metrics import OLLAMA_TOKENS_PER_SECOND, OLLAMA_TTFT
+    from app.services.ollama import OllamaClient
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        lines = [
+            {"response": "Hi", "done": False},
+            {"response": "", "done": True, "eval_count": 50, "eval_duration": 1_000_000_000},
+        ]
+        return httpx.Response(200, text="\n".join(json.dumps(line) for line in lines))
+
+    client = OllamaClient("http://ollama:11434")
+    client._client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    ttft_before = OLLAMA_TTFT.count(model="metrics-model")
+
+    chunks = [chunk async for chunk in client.generate("metrics-model", "Hello")]
+
+    assert len(chunks) == 2
+    assert OLLAMA_TTFT.count(model="metrics-model") == ttft_before + 1
+    assert OLLAMA_TOKENS_PER_SECOND.count(model="metrics-model") >= 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_records_interrupted_rounds():
+    from app.core.metrics import ORCHESTRATOR_ROUND
+    from app.core.orchestrator import Orchestrator
+
+    orchestrator = Orchestrator({})
+
+    async def failing_respond(*args, **kwargs):
+        yield "Deep"
+        raise RuntimeError("Ollama went away")
+
+    for specialist in orchestrator.specialists.values():
+        specialist.respond = failing_respond
+    before = ORCHESTRATOR_ROUND.count(phase="ideation", mode="sequential")
+
+    with pytest.raises(RuntimeError):
+        async for _ in orchestrator.process_user_message("A lighthouse"):
+            pass
+
+    # A round abandoned by its consumer is recorded as well
+    events = orchestrator.process_user_message("A lighthouse")
+    await events.__anext__()  # user_message
+    await events.__anext__()  # specialist_start
+    await events.aclose()
+
+    assert ORCHESTRATOR_ROUND.count(phase="ideation", mode="sequential") == before + 2
@@ -28,3 +28,129 @@ async def test_ollama_generate_streams_response():
 
         assert len(chunks) == 2
         assert chunks[0]["response"] == "Hello"
+
+
+def fake_ollama(models: list[str], reachable: bool = True, calls: list | None = None):
+    """In-process fake Ollama host serving /api/tags and a streaming /api/generate."""
+    import httpx
+    import json
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not reachable:
+            raise httpx.ConnectError("Connection refused", request=request)
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": name} for name in models]})
+        model = json.loads(request.content)["model"]
+        if calls is not None:
+            calls.append((str(request.url.host), model))
+        if model not in models and f"{model}:latest" not in models:
+            return httpx.Response(404, content=json.dumps({"error": f"model '{model}' not found"}) + "\n")
+        lines = [{"response": "Hi", "done": False}, {"response": "", "done": True}]
+        return httpx.Response(200, content="".join(json.dumps(line) + "\n" for line in lines))
+
+    return httpx.MockTransport(handler)
+
+
+def make_pool(**hosts):
+    import httpx
+    from app.services.ollama import OllamaPool
+
+    pool = OllamaPool([f"http://{name}:11434" for name in hosts])
+    pool.start_inventory_checks = lambda: None
+    for host, transport in zip(pool.hosts, hosts.values()):
+        host.client._client = httpx.AsyncClient(base_url=host.client.base_url, transport=transport)
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_ollama_pool_routes_by_inventory_and_load():
+    calls = []
+    pool = make_pool(
+        a=fake_ollama(["llama3.2:latest"], calls=calls),
+        b=fake_ollama(["llama3.2:latest", "mistral:latest"], calls=calls),
+    )
+    await pool.refresh()
+
+    chunks = [chunk async for chunk in pool.generate("mistral:latest", "Hello")]
+    assert chunks[0]["response"] == "Hi"
+    assert calls == [("b", "mistral:latest")]
+
+    pool.hosts[0].active = 1  # "a" is busy, so "llama3.2" goes to "b"
+    [chunk async for chunk in pool.generate("llama3.2", "Hello")]
+    assert calls[-1] == ("b", "llama3.2")
+
+
+@pytest.mark.asyncio
+async def test_ollama_pool_retries_and_ejects_failing_host():
+    from unittest.mock import patch
+
+    calls = []
+    pool = make_pool(
+        down=fake_ollama(["llama3.2:latest"], reachable=False, calls=calls),
+        up=fake_ollama(["llama3.2:latest"], calls=calls),
+    )
+    pool._refreshed = True
+    for host in pool.hosts:
+        host.models = {"llama3.2:latest"}
+        host.breaker.failure_threshold = 2
+
+    for _ in range(2):
+        chunks = [chunk async for chunk in pool.generate("llama3.2:latest", "Hello")]
+        assert chunks[0]["response"] == "Hi"
+
+    down = pool.hosts[0]
+    assert down.breaker.is_open and not down.breaker.allow()
+    [chunk async for chunk in pool.generate("llama3.2:latest", "Hello")]
+    assert calls == [("up", "llama3.2:latest")] * 3
+
+    # After the reset timeout a probe is allowed through again
+    with patch("app.services.ollama.time.monotonic", return_value=down.breaker.opened_at + 31):
+        assert down.breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_ollama_pool_surfaces_the_real_error():
+    import httpx
+    from app.services.ollama import OllamaError
+
+    calls = []
+    pool = make_pool(
+        a=fake_ollama(["llama3.2:latest"], calls=calls),
+        b=fake_ollama(["llama3.2:latest"], calls=calls),
+    )
+    await pool.refresh()
+
+    # No host lists the model: the first host's answer is final
+    with pytest.raises(OllamaError, match="model 'phi3' not found"):
+        [chunk async for chunk in pool.generate("phi3", "Hello")]
+    assert len(calls) == 1
+
+    single = make_pool(down=fake_ollama(["llama3.2:latest"], reachable=False))
+    single._refreshed = True
+    with pytest.raises(httpx.ConnectError):
+        [chunk async for chunk in single.generate("llama3.2", "Hello")]
+
+
+@pytest.mark.asyncio
+async def test_ollama_breaker_lets_one_probe_through_when_half_open():
+    from unittest.mock import patch
+
+    pool = make_pool(flaky=fake_ollama(["llama3.2:latest"]), up=fake_ollama(["llama3.2:latest"]))
+    pool._refreshed = True
+    flaky, up = pool.hosts
+    for host in pool.hosts:
+        host.models = {"llama3.2:latest"}
+    flaky.breaker.failures = flaky.breaker.failure_threshold
+    flaky.breaker.opened_at = 0.0
+    up.active = 5  # Otherwise the idle host would win anyway
+
+    with patch("app.services.ollama.time.monotonic", return_value=flaky.breaker.reset_timeout + 1):
+        probe = pool.generate("llama3.2", "Hello")
+        await probe.__anext__()
+        # While the probe is in flight, other requests avoid the half-open host
+        assert flaky.breaker.probing
+        assert pool._select("llama3.2", set()) is up
+        [chunk async for chunk in probe]
+
+    assert not flaky.breaker.is_open and not flaky.breaker.probing
+    assert pool._select("llama3.2", set()) is flaky
@@ -30,3 +30,153 @@ async def test_orchestrator_runs_ideation_phase():
 
     assert len(messages) > 0
     assert orchestrator.current_phase == Phase.IDEATION
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_parallel_mode_runs_specialists_concurrently():
+    import asyncio
+    from app.core.orchestrator import Orchestrator
+
+    orchestrator = Orchestrator({}, execution_mode="parallel")
+    started: set[str] = set()
+    all_started = asyncio.Event()
+
+    def make_respond(role):
+        async def mock_respond(*args, **kwargs):
+            started.add(role)
+            if len(started) == 3:
+                all_started.set()
+            # Only completes if every specialist is running at the same time
+            await asyncio.wait_for(all_started.wait(), timeout=1)
+            yield f"{role} reply"
+        return mock_respond
+
+    for role, specialist in orchestrator.specialists.items():
+        specialist.respond = make_respond(role)
+
+    events = []
+    async for event in orchestrator.process_user_message("Create a sunset scene"):
+        events.append(event)
+
+    chunks = [e for e in events if e["type"] == "specialist_chunk"]
+    assert {c["role"] for c in chunks} == {"style", "composition", "story"}
+    assert [m["role"] for m in orchestrator.conversation_history] == ["user", "style", "composition", "story"]
+    assert orchestrator.conversation_history[1]["content"] == "style reply"
+
+
+def test_orchestrator_snapshot_roundtrip():
+    import json
+    from app.core.orchestrator import Orchestrator
+    from app.core.phases import Phase
+
+    orchestrator = Orchestrator({"style": "mistral"})
+    orchestrator.advance_phase()
+    orchestrator.round_count = 2
+    orchestrator.inject_user_message("Make it warmer")
+
+    state = json.loads(json.dumps(orchestrator.snapshot()))
+    restored = Orchestrator.from_snapshot({"style": "mistral"}, state)
+
+    assert restored.current_phase == Phase.REFINEMENT
+    assert restored.round_count == 2
+    assert restored.conversation_history == orchestrator.conversation_history
+    assert restored.specialists["style"].model == "mistral"
+    assert "history" not in orchestrator.snapshot(include_history=False)
+
+
+def test_orchestrator_snapshot_without_history_keeps_summary():
+    import json
+    from app.core.orchestrator import Orchestrator
+
+    orchestrator = Orchestrator({"style": "mistral"})
+    for i in range(6):
+        orchestrator.inject_user_message(f"Idea {i}")
+    orchestrator.memory.summary = "A lighthouse at dusk, teal palette."
+    orchestrator.memory.summarized_upto = 4
+
+    # History comes from the messages table, the rest from the saved state
+    state = json.loads(json.dumps(orchestrator.snapshot(include_history=False)))
+    restored = Orchestrator.from_snapshot({"style": "mistral"}, state, history=list(orchestrator.conversation_history))
+
+    assert restored.memory.summary == "A lighthouse at dusk, teal palette."
+    assert restored.memory.summarized_upto == 4
+
+    # A shorter history than the summary covered cannot be indexed past
+    restored = Orchestrator.from_snapshot({"style": "mistral"}, state, history=[])
+    assert restored.memory.summarized_upto == 0
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_cancellation_closes_stream_and_keeps_partial_reply():
+    import asyncio
+    from app.core.orchestrator import Orchestrator
+
+    orchestrator = Orchestrator({})
+    stream_closed = asyncio.Event()
+
+    async def slow_respond(*args, **kwargs):
+        try:
+            yield "Deep teals"
+            await asyncio.sleep(60)
+            yield " and warm ambers"
+        finally:
+            stream_closed.set()
+
+    orchestrator.specialists["style"].respond = slow_respond
+
+    events = orchestrator.process_user_message("Create a sunset scene")
+
+    async def consume():
+        async for _ in events:
+            pass
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await events.aclose()
+
+    assert stream_closed.is_set()
+    assert orchestrator.truncate_round() == [
+        {"role": "style", "role_name": "Luna", "content": "Deep teals", "truncated": True},
+    ]
+    assert orchestrator.conversation_history[-1]["truncated"] is True
+    assert orchestrator.round_count == 0
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_groups_specialists_by_model_and_prewarms():
+    import asyncio
+    from app.core.orchestrator import Orchestrator
+
+    orchestrator = Orchestrator({"style": "mistral", "composition": "llama3.2", "story": "mistral", "critic": "qwen"})
+    order = []
+
+    def make_respond(role):
+        async def mock_respond(*args, **kwargs):
+            order.append(role)
+            yield f"{role} reply"
+        return mock_respond
+
+    for role, specialist in orchestrator.specialists.items():
+        specialist.respond = make_respond(role)
+
+    with patch("app.core.orchestrator.get_ollama_client") as mock_client:
+        mock_client.return_value.prewarm = AsyncMock()
+
+        async for _ in orchestrator.process_user_message("Create a sunset scene"):
+            pass
+        await asyncio.sleep(0)
+        # The next round starts with the model still loaded, so nothing to warm
+        mock_client.return_value.prewarm.assert_not_called()
+
+        orchestrator.advance_phase()
+        orchestrator._last_model = "phi3"
+        orchestrator._schedule_prewarm()
+        await orchestrator._prewarm_task
+
+    assert order == ["style", "story", "composition"]
+    assert [m["role"] for m in orchestrator.conversation_history[1:]] == ["style", "story", "composition"]
+    assert orchestrator._model_groups(["style", "composition", "story", "critic"]) == [["style", "story"], ["composition"], ["critic"]]
+    mock_client.return_value.prewarm.assert_awaited_once_with("mistral")
@@ -0,0 +1,46 @@
+import pytest
+from fastapi import HTTPException
+from unittest.mock import MagicMock
+
+CURSOR = "2024-05-01T12:00:00.5+00:00,8c3a6b2e-1111-4222-8333-444455556666"
+
+
+def test_cursor_and_projection_validation():
+    from app.api.pagination import parse_cursor, select_columns
+
+    # An unencoded "+" arrives as a space
+    assert parse_cursor(CURSOR.replace("+", " ")) == (
+        "2024-05-01T12:00:00.500000+00:00",
+        "8c3a6b2e-1111-4222-8333-444455556666",
+    )
+    with pytest.raises(HTTPException):
+        parse_cursor("yesterday,1")
+
+    assert select_columns("status, progress", ("status", "progress"), ()) == "id, created_at, status, progress"
+    with pytest.raises(HTTPException):
+        select_columns("workflow_json", ("status",), ())
+
+
+def test_keyset_page_orders_towards_the_cursor():
+    from app.api.pagination import keyset_page
+
+    query = MagicMock()
+    query.or_.return_value = query
+    query.order.return_value = query
+    query.limit.return_value = query
+
+    # Older messages: walk back from the cursor, then reverse to oldest first
+    _, reverse = keyset_page(query, CURSOR, None, 20, newest_first=False)
+    assert 'created_at.lt."2024-05-01T12:00:00.500000+00:00"' in query.or_.call_args.args[0]
+    query.order.assert_called_with("id", desc=True)
+    query.limit.assert_called_with(20)
+    assert reverse
+
+    # Newer generations: walk forward from the cursor, then reverse to newest first
+    _, reverse = keyset_page(query, None, CURSOR, 20, newest_first=True)
+    assert "id.gt.8c3a6b2e-1111-4222-8333-444455556666" in query.or_.call_args.args[0]
+    query.order.assert_called_with("id", desc=False)
+    assert reverse
+
+    _, reverse = keyset_page(query, None, None, 20, newest_first=True)
+    assert not reverse
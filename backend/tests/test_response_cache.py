@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import patch
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_cache_backends_evict_lru_and_expired(tmp_path, on_disk):
+    from app.services.response_cache import MemoryCacheBackend, SQLiteCacheBackend
+
+    if on_disk:
+        backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), max_entries=2, ttl=60)
+    else:
+        backend = MemoryCacheBackend(max_entries=2, ttl=60)
+
+    with patch("app.services.response_cache.time.time", return_value=1000.0):
+        backend.set("a", {"response": "A"})
+    with patch("app.services.response_cache.time.time", return_value=1001.0):
+        backend.set("b", {"response": "B"})
+    with patch("app.services.response_cache.time.time", return_value=1002.0):
+        assert backend.get("a") == {"response": "A"}  # "b" is now least recently used
+        backend.set("c", {"response": "C"})
+        assert backend.get("b") is None
+        assert len(backend) == 2
+    with patch("app.services.response_cache.time.time", return_value=1061.0):
+        assert backend.get("a") is None  # Expired
+        assert backend.get("c") == {"response": "C"}
+
+
+@pytest.mark.asyncio
+async def test_specialist_replays_cached_response():
+    from app.core.specialists.base import BaseSpecialist
+    from app.services.response_cache import ResponseCache
+
+    class TestSpecialist(BaseSpecialist):
+        role = "test"
+        name = "Testy"
+        system_prompt = "You are a test specialist."
+
+    calls = 0
+
+    async def mock_generate(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        yield {"response": "A neon-soaked skyline ", "done": False}
+        yield {"response": "under acid rain.", "done": True, "context": [7, 8]}
+
+    cache = ResponseCache()
+    history = [{"role": "user", "role_name": "User", "content": "a cyberpunk city at night"}]
+
+    with patch("app.core.specialists.base.get_ollama_client") as mock_client, \
+            patch("app.core.specialists.base.get_response_cache", return_value=cache):
+        mock_client.return_value.generate = mock_generate
+
+        first = [chunk async for chunk in TestSpecialist("test-model").respond("a cyberpunk city at night", history)]
+        replayed = TestSpecialist("test-model")
+        second = [chunk async for chunk in replayed.respond("a cyberpunk city at night", history)]
+
+    assert calls == 1
+    assert "".join(second) == "".join(first) == "A neon-soaked skyline under acid rain."
+    assert len(second) > 1  # Still streamed in chunks
+    assert replayed._context == [7, 8]
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_interactive_lane_first_within_concurrency():
+    from app.core.scheduler import GenerationScheduler
+
+    started = []
+    release = asyncio.Event()
+    peak = 0
+
+    async def runner(generation_id, workflow):
+        nonlocal peak
+        started.append(generation_id)
+        peak = max(peak, scheduler.running)
+        await release.wait()
+
+    scheduler = GenerationScheduler(runner, concurrency=1)
+    assert await scheduler.submit("batch-1", {}, "batch") == 0
+    assert await scheduler.submit("batch-2", {}, "batch") == 1
+    assert await scheduler.submit("interactive-1", {}) == 0
+
+    await scheduler.start(recover=False)
+    await asyncio.sleep(0.01)
+    assert started == ["interactive-1"]
+
+    release.set()
+    await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+    assert started == ["interactive-1", "batch-1", "batch-2"]
+    assert peak == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_rejects_when_saturated():
+    from app.core.scheduler import GenerationScheduler, QueueFullError
+
+    scheduler = GenerationScheduler(AsyncMock(), max_queue=1)
+    await scheduler.submit("a", {})
+
+    assert scheduler.is_saturated()
+    with pytest.raises(QueueFullError):
+        await scheduler.submit("b", {})
+    assert await scheduler.submit("c", {}, force=True) == 1
+
+
+def mock_recovery_db(rows: list[dict], claimed: set[str] | None = None) -> MagicMock:
+    """Supabase mock listing `rows` as expired; claims succeed for `claimed` (default: all)."""
+    db = MagicMock()
+    select = db.table.return_value.select.return_value.in_.return_value.or_.return_value.order.return_value
+    select.execute = AsyncMock(return_value=MagicMock(data=rows))
+
+    claim = db.table.return_value.update.return_value.in_.return_value.in_.return_value.or_.return_value
+
+    async def claim_rows():
+        ids = db.table.return_value.update.return_value.in_.call_args.args[1]
+        return MagicMock(data=[{"id": row_id} for row_id in ids if claimed is None or row_id in claimed])
+
+    claim.execute = AsyncMock(side_effect=claim_rows)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_scheduler_recovers_unfinished_generations():
+    from app.core.scheduler import GenerationScheduler
+
+    db = mock_recovery_db([
+        {"id": "stuck", "workflow_json": {"3": {}}},
+        {"id": "broken", "workflow_json": None},
+    ])
+
+    scheduler = GenerationScheduler(AsyncMock())
+    with patch("app.core.scheduler.get_async_supabase_client", new_callable=AsyncMock, return_value=db):
+        await scheduler.recover()
+
+    assert scheduler.queued == 1
+    db.table.return_value.update.return_value.in_.assert_called_once_with("id", ["stuck"])
+    claim = db.table.return_value.update.call_args.args[0]
+    assert claim["status"] == "queued"
+    assert claim["worker_id"] == scheduler.worker_id
+
+
+@pytest.mark.asyncio
+async def test_scheduler_recovers_batched_rows_as_one_job():
+    from app.core.scheduler import GenerationScheduler
+
+    db = mock_recovery_db([
+        {"id": "b1", "workflow_json": {"3": {}}, "parameters": {"batch_id": "pack", "batch_index": 1}},
+        {"id": "b0", "workflow_json": {"3": {}}, "parameters": {"batch_id": "pack", "batch_index": 0}},
+        {"id": "single", "workflow_json": {"3": {}}, "parameters": {}},
+    ])
+
+    runner = AsyncMock()
+    scheduler = GenerationScheduler(runner, concurrency=1)
+    with patch("app.core.scheduler.get_async_supabase_client", new_callable=AsyncMock, return_value=db):
+        await scheduler.start()
+    await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+    # Without a stored priority the batch is inferred back into the batch lane
+    assert runner.await_args_list[0].args == ("single", {"3": {}})
+    assert runner.await_args_list[1].args == ("b0", {"3": {}}, ["b1"])
+
+
+@pytest.mark.asyncio
+async def test_scheduler_skips_rows_claimed_by_another_worker():
+    from app.core.scheduler import GenerationScheduler
+
+    db = mock_recovery_db([
+        {"id": "theirs", "workflow_json": {"3": {}}, "priority": "interactive"},
+        {"id": "ours", "workflow_json": {"3": {}}, "priority": "batch"},
+    ], claimed={"ours"})
+
+    scheduler = GenerationScheduler(AsyncMock())
+    with patch("app.core.scheduler.get_async_supabase_client", new_callable=AsyncMock, return_value=db):
+        await scheduler.recover()
+
+    assert scheduler.queued == 1
+    assert scheduler._heap[0].generation_id == "ours"
+    assert scheduler._heap[0].rank == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_counts_failed_lease_renewals():
+    from app.core.metrics import GENERATION_LEASE_RENEWAL_FAILURES
+    from app.core.scheduler import GenerationScheduler
+
+    scheduler = GenerationScheduler(AsyncMock(), lease_seconds=0.3)
+    scheduler.renew_leases = AsyncMock(side_effect=RuntimeError("Database unavailable"))
+    scheduler.recover = AsyncMock()
+    before = GENERATION_LEASE_RENEWAL_FAILURES.value()
+
+    task = asyncio.create_task(scheduler._lease_loop())
+    await asyncio.sleep(0.15)
+    task.cancel()
+
+    assert GENERATION_LEASE_RENEWAL_FAILURES.value() == before + 1
+    # Recovery still runs when renewal fails
+    scheduler.recover.assert_awaited_once()
@@ -30,3 +30,79 @@ async def test_specialist_generates_response():
             response += chunk
 
         assert response == "Hello there"
+
+
+@pytest.mark.asyncio
+async def test_specialist_reuses_ollama_context():
+    from app.core.specialists.base import BaseSpecialist
+
+    class TestSpecialist(BaseSpecialist):
+        role = "test"
+        name = "Testy"
+        system_prompt = "You are a test specialist."
+
+    calls = []
+
+    async def mock_generate(*args, **kwargs):
+        calls.append(kwargs)
+        yield {"response": "Reply", "done": False}
+        yield {"response": "", "done": True, "context": [1, 2, 3]}
+
+    with patch('app.core.specialists.base.get_ollama_client') as mock_client:
+        mock_client.return_value.generate = mock_generate
+
+        specialist = TestSpecialist(model="test-model")
+        history = [{"role": "user", "role_name": "User", "content": "First idea"}]
+
+        async for _ in specialist.respond("First idea", history):
+            pass
+        assert calls[0]["context"] is None
+        assert "Previous conversation" in calls[0]["prompt"]
+
+        history += [
+            {"role": "test", "role_name": "Testy", "content": "Reply"},
+            {"role": "user", "role_name": "User", "content": "Second idea"},
+        ]
+        async for _ in specialist.respond("Second idea", history):
+            pass
+        assert calls[1]["context"] == [1, 2, 3]
+        assert "First idea" not in calls[1]["prompt"]
+        assert "Testy: Reply" not in calls[1]["prompt"]
+        assert "User: Second idea" in calls[1]["prompt"]
+
+        # Changing the model invalidates the cached context
+        specialist.model = "other-model"
+        async for _ in specialist.respond("Third idea", history):
+            pass
+        assert calls[2]["context"] is None
+        assert "First idea" in calls[2]["prompt"]
+
+
+@pytest.mark.asyncio
+async def test_technical_specialist_retries_invalid_json():
+    from app.core.specialists.technical import TechnicalSpecialist
+
+    replies = [
+        '{"prompt": "a castle", "steps": 500}',
+        '{"prompt": "a castle", "steps": 30, "width": 768, "sampler": "dpmpp_2m", "notes": "Sharp detail."}',
+    ]
+    calls = []
+
+    async def mock_generate(*args, **kwargs):
+        calls.append(kwargs)
+        yield {"response": replies[len(calls) - 1], "done": True}
+
+    with patch('app.core.specialists.base.get_ollama_client') as mock_client:
+        mock_client.return_value.generate = mock_generate
+
+        specialist = TechnicalSpecialist(model="test-model")
+        response = ""
+        async for chunk in specialist.respond("Paint a castle", []):
+            response += chunk
+
+    assert len(calls) == 2
+    assert calls[0]["format"]["title"] == "WorkflowParameters"
+    assert "steps" in calls[1]["prompt"] and "invalid" in calls[1]["prompt"]
+    assert specialist.structured_output.steps == 30
+    assert specialist.structured_output.width == 768
+    assert "768x1024, 30 steps" in response
@@ -0,0 +1,37 @@
+import pytest
+from unittest.mock import patch
+
+
+def test_store_evicts_least_recently_used():
+    from app.core.orchestrator import Orchestrator
+    from app.core.store import OrchestratorStore
+
+    store = OrchestratorStore(max_size=2)
+    first, second, third = Orchestrator({}), Orchestrator({}), Orchestrator({})
+
+    store.put("a", first)
+    store.put("b", second)
+    assert store.get("a") is first  # "b" is now least recently used
+    store.put("c", third)
+
+    assert store.get("b") is None
+    assert store.get("a") is first
+    assert store.get("c") is third
+    assert len(store) == 2
+
+
+def test_store_evicts_idle_entries():
+    from app.core.orchestrator import Orchestrator
+    from app.core.store import OrchestratorStore
+
+    store = OrchestratorStore(idle_ttl=60)
+
+    with patch("app.core.store.time.monotonic", return_value=1000.0):
+        store.put("a", Orchestrator({}))
+
+    with patch("app.core.store.time.monotonic", return_value=1059.0):
+        assert "a" in store
+
+    with patch("app.core.store.time.monotonic", return_value=1120.0):
+        assert store.get("a") is None
+        assert len(store) == 0
@@ -5,3 +5,24 @@ def test_supabase_client_connects(supabase_client):
     # Should be able to query sessions table
     result = supabase_client.table("sessions").select("*").limit(1).execute()
     assert result.data is not None
+
+
+@pytest.mark.asyncio
+async def test_async_supabase_client_is_shared():
+    from unittest.mock import AsyncMock, MagicMock, patch
+    from app.services import supabase as supabase_service
+
+    supabase_service._async_client = None
+    mock_client = MagicMock()
+
+    with patch.object(supabase_service, "acreate_client", new_callable=AsyncMock, return_value=mock_client) as mock_create:
+        first = await supabase_service.get_async_supabase_client()
+        second = await supabase_service.get_async_supabase_client()
+
+        assert first is second is mock_client
+        mock_create.assert_awaited_once()
+        options = mock_create.call_args.kwargs["options"]
+        assert options.httpx_client.timeout.read == supabase_service.settings.supabase_timeout
+        await options.httpx_client.aclose()
+
+    supabase_service._async_client = None
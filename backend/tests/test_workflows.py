@@ -0,0 +1,41 @@
+import pytest
+
+
+def test_build_txt2img_workflow_patches_slots():
+    from app.workflows.builder import build_txt2img_workflow, get_template_registry
+
+    workflow = build_txt2img_workflow("a cyberpunk city", steps=30, cfg=6.5, seed=42, width=768)
+
+    assert workflow["3"]["inputs"]["seed"] == 42
+    assert workflow["3"]["inputs"]["steps"] == 30
+    assert workflow["3"]["inputs"]["cfg"] == 6.5
+    assert workflow["5"]["inputs"]["width"] == 768
+    assert workflow["6"]["inputs"]["text"] == "a cyberpunk city"
+    assert workflow["7"]["inputs"]["text"] == "ugly, blurry, low quality"
+
+    # Rendering never touches the cached template
+    template = get_template_registry().get("basic_txt2img")
+    assert template.workflow["6"]["inputs"]["text"] == ""
+    assert template.workflow["3"]["inputs"]["seed"] == 0
+
+
+def test_template_rejects_dangling_links_and_unknown_slots():
+    from app.workflows.builder import TemplateError, WorkflowTemplate
+
+    with pytest.raises(TemplateError):
+        WorkflowTemplate("broken", {"3": {"class_type": "KSampler", "inputs": {"model": ["4", 0]}}})
+
+    template = WorkflowTemplate("tiny", {"4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "a"}}})
+    assert template.render(checkpoint="b")["4"]["inputs"]["ckpt_name"] == "b"
+    with pytest.raises(TemplateError):
+        template.render(steps=10)
+
+
+def test_workflow_hash_ignores_key_order():
+    from app.workflows.builder import build_txt2img_workflow, workflow_hash
+
+    workflow = build_txt2img_workflow("a lighthouse", seed=7)
+    reordered = {node_id: dict(reversed(node.items())) for node_id, node in reversed(workflow.items())}
+
+    assert workflow_hash(reordered) == workflow_hash(workflow)
+    assert workflow_hash(build_txt2img_workflow("a lighthouse", seed=8)) != workflow_hash(workflow)
@@ -1,10 +1,10 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useCallback, useEffect, useState } from 'react';
 import { useParams } from 'next/navigation';
 import { MessageStream, ChatInput } from '@/components/chat';
 import { useSSE } from '@/hooks/useSSE';
-import { getSession, createConversation, getMessages } from '@/lib/api';
+import { getSession, createConversation, getMessages, pageCursor, MESSAGE_PAGE_SIZE } from '@/lib/api';
 import type { Session, Conversation } from '@/types';
 
 export default function ChatPage() {
@@ -15,6 +15,8 @@ export default function ChatPage() {
   const [conversation, setConversation] = useState<Conversation | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [hasOlder, setHasOlder] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
 
   const { messages, streamingMessage, isStreaming, sendMessage, setMessages } = useSSE();
 
@@ -31,6 +33,7 @@ export default function ChatPage() {
         // Load existing messages if any
         const msgs = await getMessages(conv.id);
         setMessages(msgs);
+        setHasOlder(msgs.length === MESSAGE_PAGE_SIZE);
       } catch (e) {
         setError('Failed to initialize chat');
         console.error(e);
@@ -42,6 +45,21 @@ export default function ChatPage() {
     init();
   }, [sessionId, setMessages]);
 
+  // The API returns the newest page; older pages load on demand
+  const loadOlder = useCallback(async () => {
+    if (!conversation || loadingOlder || messages.length === 0) return;
+    setLoadingOlder(true);
+    try {
+      const older = await getMessages(conversation.id, pageCursor(messages[0]));
+      setMessages((prev) => [...older, ...prev]);
+      setHasOlder(older.length === MESSAGE_PAGE_SIZE);
+    } catch (e) {
+      console.error('Failed to load older messages:', e);
+    } finally {
+      setLoadingOlder(false);
+    }
+  }, [conversation, loadingOlder, messages, setMessages]);
+
   const handleSend = (content: string) => {
     if (!conversation) return;
     sendMessage(conversation.id, content);
@@ -72,7 +90,12 @@ export default function ChatPage() {
         </span>
       </header>
 
-      <MessageStream messages={messages} streamingMessage={streamingMessage} />
+      <MessageStream
+        messages={messages}
+        streamingMessage={streamingMessage}
+        hasOlder={hasOlder}
+        onLoadOlder={loadOlder}
+      />
 
       <ChatInput onSend={handleSend} disabled={isStreaming} />
     </div>
@@ -5,17 +5,46 @@ import type { Message, SpecialistRole } from '@/types';
 interface MessageStreamProps {
   messages: Message[];
   streamingMessage?: { role: string; name: string; content: string } | null;
+  hasOlder?: boolean;
+  onLoadOlder?: () => void;
 }
 
-export function MessageStream({ messages, streamingMessage }: MessageStreamProps) {
+export function MessageStream({ messages, streamingMessage, hasOlder, onLoadOlder }: MessageStreamProps) {
+  const containerRef = useRef<HTMLDivElement>(null);
   const bottomRef = useRef<HTMLDivElement>(null);
+  const scrollHeightRef = useRef(0);
+  const lastIdRef = useRef<string | undefined>(undefined);
 
   useEffect(() => {
-    bottomRef.current?.scrollIntoView({ behavior: 'smooth' });
+    const container = containerRef.current;
+    const lastId = messages[messages.length - 1]?.id;
+    if (lastId === lastIdRef.current && !streamingMessage && container) {
+      // Older messages were prepended: keep the same messages in view
+      container.scrollTop += container.scrollHeight - scrollHeightRef.current;
+    } else {
+      bottomRef.current?.scrollIntoView({ behavior: 'smooth' });
+    }
+    lastIdRef.current = lastId;
+    scrollHeightRef.current = container?.scrollHeight ?? 0;
   }, [messages, streamingMessage]);
 
+  const handleScroll = () => {
+    if (hasOlder && containerRef.current?.scrollTop === 0) {
+      onLoadOlder?.();
+    }
+  };
+
   return (
-    <div className="flex-1 overflow-y-auto p-4 space-y-4">
+    <div ref={containerRef} onScroll={handleScroll} className="flex-1 overflow-y-auto p-4 space-y-4">
+      {hasOlder && (
+        <button
+          type="button"
+          onClick={onLoadOlder}
+          className="block mx-auto text-sm text-gray-500 hover:text-gray-700"
+        >
+          Load older messages
+        </button>
+      )}
       {messages.map((message) => (
         <MessageBubble
           key={message.id}
@@ -1,6 +1,7 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
+import { pageCursor } from '@/lib/api';
 import { ProgressBar } from './ProgressBar';
 
 interface Generation {
@@ -11,9 +12,14 @@ interface Generation {
     prompt_id?: string;
     images?: Array<{ filename: string; subfolder: string }>;
   };
+  outputs?: Array<{ filename: string; key: string; url: string }>;
   error?: string;
+  created_at?: string;
 }
 
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+const PAGE_SIZE = 50;
+
 interface GenerationPreviewProps {
   conversationId: string;
 }
@@ -21,29 +27,110 @@ interface GenerationPreviewProps {
 export function GenerationPreview({ conversationId }: GenerationPreviewProps) {
   const [generations, setGenerations] = useState<Generation[]>([]);
   const [loading, setLoading] = useState(true);
+  const [hasOlder, setHasOlder] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  // Set once older pages are shown, so a reload of the newest page keeps them
+  const pagedRef = useRef(false);
 
   useEffect(() => {
+    pagedRef.current = false;
+    // Updates pushed while a list request is in flight are newer than its rows
+    let pushedDuringFetch: Map<string, Partial<Generation>> | null = null;
+
     const fetchGenerations = async () => {
+      const pushed = new Map<string, Partial<Generation>>();
+      pushedDuringFetch = pushed;
       try {
-        const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
-        const res = await fetch(`${API_URL}/api/generations/conversation/${conversationId}`);
+        const res = await fetch(
+          `${API_URL}/api/generations/conversation/${conversationId}?limit=${PAGE_SIZE}`,
+        );
         if (res.ok) {
-          setGenerations(await res.json());
+          const fetched: Generation[] = await res.json();
+          const fetchedIds = new Set(fetched.map((gen) => gen.id));
+          const oldest = fetched[fetched.length - 1]?.created_at;
+          const isOlderPage = (gen: Generation) =>
+            fetched.length === PAGE_SIZE && !!oldest && !!gen.created_at && gen.created_at < oldest;
+          setGenerations((prev) => {
+            const rest = prev.filter((gen) => !fetchedIds.has(gen.id));
+            return [
+              // Generations created after the list was read are only known from the stream
+              ...rest.filter((gen) => !isOlderPage(gen)),
+              ...fetched.map((gen) => ({ ...gen, ...pushed.get(gen.id) })),
+              ...rest.filter(isOlderPage),
+            ];
+          });
+          if (!pagedRef.current) {
+            setHasOlder(fetched.length === PAGE_SIZE);
+          }
         }
       } catch (e) {
         console.error('Failed to fetch generations:', e);
       } finally {
+        if (pushedDuringFetch === pushed) {
+          pushedDuringFetch = null;
+        }
         setLoading(false);
       }
     };
 
-    fetchGenerations();
-
-    // Poll for updates
-    const interval = setInterval(fetchGenerations, 2000);
-    return () => clearInterval(interval);
+    // Server pushes status, progress and outputs as generations advance.
+    // The list is (re)loaded once the stream is open, so no change falls
+    // between the two, including after a reconnect.
+    const events = new EventSource(`${API_URL}/api/generations/conversation/${conversationId}/events`);
+    let opened = false;
+    events.addEventListener('open', () => {
+      opened = true;
+      fetchGenerations();
+    });
+    events.addEventListener('error', () => {
+      // Still show the list if the stream cannot connect at all
+      if (!opened) {
+        opened = true;
+        fetchGenerations();
+      }
+    });
+    events.addEventListener('generation', (e) => {
+      const update = JSON.parse((e as MessageEvent).data) as Partial<Generation> & { id: string };
+      pushedDuringFetch?.set(update.id, { ...pushedDuringFetch.get(update.id), ...update });
+      setGenerations((prev) => {
+        const index = prev.findIndex((gen) => gen.id === update.id);
+        if (index === -1) {
+          return [{ status: 'queued', progress: 0, ...update } as Generation, ...prev];
+        }
+        const next = [...prev];
+        next[index] = { ...next[index], ...update };
+        return next;
+      });
+    });
+    return () => events.close();
   }, [conversationId]);
 
+  const loadOlder = async () => {
+    // Rows are newest first, so the last one carries the cursor
+    const oldest = generations[generations.length - 1];
+    if (loadingOlder || !oldest?.created_at) return;
+    setLoadingOlder(true);
+    try {
+      const before = encodeURIComponent(pageCursor({ id: oldest.id, created_at: oldest.created_at }));
+      const res = await fetch(
+        `${API_URL}/api/generations/conversation/${conversationId}?limit=${PAGE_SIZE}&before=${before}`,
+      );
+      if (res.ok) {
+        const older: Generation[] = await res.json();
+        pagedRef.current = true;
+        setGenerations((prev) => {
+          const known = new Set(prev.map((gen) => gen.id));
+          return [...prev, ...older.filter((gen) => !known.has(gen.id))];
+        });
+        setHasOlder(older.length === PAGE_SIZE);
+      }
+    } catch (e) {
+      console.error('Failed to fetch older generations:', e);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   if (loading) {
     return <div className="p-4 text-gray-500">Loading generations...</div>;
   }
@@ -66,6 +153,16 @@ export function GenerationPreview({ conversationId }: GenerationPreviewProps) {
           ) : null}
         </div>
       ))}
+      {hasOlder && (
+        <button
+          type="button"
+          onClick={loadOlder}
+          disabled={loadingOlder}
+          className="text-sm text-gray-500 hover:text-gray-700"
+        >
+          {loadingOlder ? 'Loading...' : 'Load older generations'}
+        </button>
+      )}
     </div>
   );
 }
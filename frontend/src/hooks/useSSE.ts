@@ -1,4 +1,4 @@
-import { useState, useCallback, useRef } from 'react';
+import { useState, useCallback, useRef, type Dispatch, type SetStateAction } from 'react';
 import { sendMessageSSE } from '@/lib/api';
 import type { SSEEvent, Message } from '@/types';
 
@@ -8,7 +8,7 @@ interface UseSSEReturn {
   isStreaming: boolean;
   sendMessage: (conversationId: string, content: string) => void;
   addMessage: (message: Message) => void;
-  setMessages: (messages: Message[]) => void;
+  setMessages: Dispatch<SetStateAction<Message[]>>;
 }
 
 export function useSSE(): UseSSEReturn {
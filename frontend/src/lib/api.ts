@@ -28,8 +28,21 @@ export async function createConversation(sessionId: string): Promise<Conversatio
   return res.json();
 }
 
-export async function getMessages(conversationId: string): Promise<Message[]> {
-  const res = await fetch(`${API_URL}/api/chat/conversations/${conversationId}/messages`);
+export const MESSAGE_PAGE_SIZE = 100;
+
+// Keyset cursor for the paged list endpoints, taken from any returned row
+export function pageCursor(row: { id: string; created_at: string }): string {
+  return `${row.created_at},${row.id}`;
+}
+
+export async function getMessages(
+  conversationId: string,
+  before?: string,
+  limit: number = MESSAGE_PAGE_SIZE,
+): Promise<Message[]> {
+  const query = new URLSearchParams({ limit: String(limit) });
+  if (before) query.set('before', before);
+  const res = await fetch(`${API_URL}/api/chat/conversations/${conversationId}/messages?${query}`);
   if (!res.ok) throw new Error('Failed to get messages');
   return res.json();
 }
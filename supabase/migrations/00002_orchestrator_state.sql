@@ -0,0 +1,2 @@
+-- Persisted orchestrator phase/round state; history is rehydrated from messages
+ALTER TABLE conversations ADD COLUMN orchestrator_state JSONB DEFAULT '{}'::jsonb;
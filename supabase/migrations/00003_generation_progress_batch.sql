@@ -0,0 +1,10 @@
+-- Batched progress updates for in-flight generations, one round trip per flush
+CREATE OR REPLACE FUNCTION update_generation_progress(updates JSONB)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE generations AS g
+    SET progress = u.progress
+    FROM jsonb_to_recordset(updates) AS u(id UUID, progress INTEGER)
+    WHERE g.id = u.id AND g.status IN ('queued', 'running');
+$$;
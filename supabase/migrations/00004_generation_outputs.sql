@@ -0,0 +1,2 @@
+-- Stored output files (content-addressed keys in the generations bucket)
+ALTER TABLE generations ADD COLUMN outputs JSONB DEFAULT '[]'::jsonb;
@@ -0,0 +1,4 @@
+-- Canonical workflow hash, so fixed-seed repeats can reuse completed outputs
+ALTER TABLE generations ADD COLUMN workflow_hash TEXT;
+
+CREATE INDEX idx_generations_workflow_hash ON generations(workflow_hash) WHERE status = 'complete';
@@ -0,0 +1,29 @@
+-- Publish generation changes on the generation_events channel, for API workers
+-- that stream status over SSE (set GENERATION_EVENTS_DSN to listen)
+CREATE OR REPLACE FUNCTION notify_generation_event()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    payload JSONB;
+BEGIN
+    payload := jsonb_build_object(
+        'id', NEW.id,
+        'conversation_id', NEW.conversation_id,
+        'status', NEW.status,
+        'progress', NEW.progress,
+        'error', NEW.error,
+        'outputs', NEW.outputs
+    );
+    -- NOTIFY payloads are capped at 8000 bytes; clients refetch large outputs
+    IF octet_length(payload::text) > 7900 THEN
+        payload := payload - 'outputs' || jsonb_build_object('outputs_truncated', true);
+    END IF;
+    PERFORM pg_notify('generation_events', payload::text);
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER generations_notify
+AFTER INSERT OR UPDATE OF status, progress, outputs, error ON generations
+FOR EACH ROW EXECUTE FUNCTION notify_generation_event();
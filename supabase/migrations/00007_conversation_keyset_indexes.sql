@@ -0,0 +1,7 @@
+-- Keyset pagination walks (conversation_id, created_at, id) in both directions
+CREATE INDEX idx_messages_conversation_created ON messages(conversation_id, created_at, id);
+CREATE INDEX idx_generations_conversation_created ON generations(conversation_id, created_at, id);
+
+-- Covered by the composite indexes' leading column
+DROP INDEX IF EXISTS idx_messages_conversation;
+DROP INDEX IF EXISTS idx_generations_conversation;
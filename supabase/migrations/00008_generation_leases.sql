@@ -0,0 +1,10 @@
+-- Scheduler lane, and the lease of the API worker holding a queued/running row.
+-- Workers renew their leases; recovery only claims rows whose lease expired.
+ALTER TABLE generations ADD COLUMN priority TEXT;
+ALTER TABLE generations ADD COLUMN worker_id TEXT;
+ALTER TABLE generations ADD COLUMN lease_expires_at TIMESTAMPTZ;
+
+CREATE INDEX idx_generations_unfinished_lease ON generations(lease_expires_at)
+    WHERE status IN ('queued', 'running');
+CREATE INDEX idx_generations_unfinished_worker ON generations(worker_id)
+    WHERE status IN ('queued', 'running');